@@ -24,6 +24,22 @@ if config.config_file_name is not None:
 from app.models import Base
 target_metadata = Base.metadata
 
+# Keep migrations from queueing behind (and in front of) live traffic: give up
+# quickly when a lock is not available instead of holding up every query
+# waiting on the same table. Set to 0 to disable.
+LOCK_TIMEOUT_MS = int(os.getenv("MIGRATION_LOCK_TIMEOUT_MS", "5000"))
+STATEMENT_TIMEOUT_MS = int(os.getenv("MIGRATION_STATEMENT_TIMEOUT_MS", "0"))
+
+
+def configure_timeouts(connection) -> None:
+    """Apply lock/statement timeouts to the migration connection."""
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET lock_timeout = {LOCK_TIMEOUT_MS}")
+        connection.exec_driver_sql(f"SET statement_timeout = {STATEMENT_TIMEOUT_MS}")
+    elif connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"PRAGMA busy_timeout = {LOCK_TIMEOUT_MS}")
+    connection.commit()
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -68,8 +84,13 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        configure_timeouts(connection)
+        # One transaction per revision, so revisions using the helpers in
+        # online.py (which commit as they go) don't split a larger transaction
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            transaction_per_migration=True,
         )
 
         with context.begin_transaction():
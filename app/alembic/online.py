@@ -0,0 +1,135 @@
+"""Helpers for migrations that must not block traffic on large tables.
+
+Use them from a revision like::
+
+    from app.alembic.online import batched_backfill, create_index_concurrently
+
+    def upgrade() -> None:
+        create_index_concurrently('ix_votes_user_id', 'votes', ['user_id'])
+        batched_backfill(
+            'votes_weight',
+            'votes',
+            "UPDATE votes SET weight = 1 WHERE id BETWEEN :start AND :end",
+        )
+
+Both helpers commit as they go, so a revision using them should do nothing
+else that needs to be atomic with them.
+"""
+import logging
+import time
+from typing import List
+
+from alembic import op
+import sqlalchemy as sa
+
+logger = logging.getLogger("alembic.online")
+
+CHECKPOINT_TABLE = "migration_checkpoints"
+
+
+def create_index_concurrently(index_name: str, table_name: str, columns: List[str], unique: bool = False) -> None:
+    """Create an index without blocking writes.
+
+    On PostgreSQL this runs ``CREATE INDEX CONCURRENTLY`` outside the
+    migration transaction, first dropping any invalid index left behind by
+    an earlier interrupted build. Other databases get a plain
+    ``CREATE INDEX`` (SQLite has no concurrent build).
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.create_index(index_name, table_name, columns, unique=unique, if_not_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        invalid = bind.execute(sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": index_name}).first()
+        if invalid:
+            logger.info("Dropping invalid index %s from an interrupted build", index_name)
+            op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True)
+        op.create_index(
+            index_name, table_name, columns, unique=unique,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    """Drop an index, using ``DROP INDEX CONCURRENTLY`` on PostgreSQL."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.drop_index(index_name, table_name=table_name, if_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+
+
+def _ensure_checkpoint_table(bind) -> None:
+    checkpoints = sa.Table(
+        CHECKPOINT_TABLE, sa.MetaData(),
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("last_id", sa.Integer(), nullable=False),
+    )
+    checkpoints.create(bind, checkfirst=True)
+
+
+def batched_backfill(
+    name: str,
+    table_name: str,
+    statement: str,
+    batch_size: int = 1000,
+    throttle: float = 0.0,
+    key: str = "id",
+) -> int:
+    """Run ``statement`` over ``table_name`` in committed batches of ``key``.
+
+    ``statement`` receives inclusive ``:start`` and ``:end`` bounds for each
+    batch. Progress is checkpointed under ``name`` in the
+    ``migration_checkpoints`` table after every batch, so a failed or
+    interrupted run resumes where it stopped. The statement must therefore
+    be idempotent for a batch that is repeated after a crash. ``throttle``
+    seconds are slept between batches to leave room for live traffic.
+
+    Returns the number of batches run.
+    """
+    bind = op.get_bind()
+    batches = 0
+    with op.get_context().autocommit_block():
+        _ensure_checkpoint_table(bind)
+        last_id = bind.execute(
+            sa.text(f"SELECT last_id FROM {CHECKPOINT_TABLE} WHERE name = :name"), {"name": name}
+        ).scalar()
+        if last_id is None:
+            last_id = bind.execute(sa.text(f"SELECT MIN({key}) - 1 FROM {table_name}")).scalar()
+            if last_id is None:
+                logger.info("%s: %s is empty, nothing to backfill", name, table_name)
+                return 0
+            bind.execute(
+                sa.text(f"INSERT INTO {CHECKPOINT_TABLE} (name, last_id) VALUES (:name, :last_id)"),
+                {"name": name, "last_id": last_id},
+            )
+        max_id = bind.execute(sa.text(f"SELECT MAX({key}) FROM {table_name}")).scalar()
+
+        while last_id < max_id:
+            # The batch ends at the batch_size-th key after the checkpoint, or
+            # at the current maximum for the final partial batch
+            end = bind.execute(sa.text(
+                f"SELECT {key} FROM {table_name} WHERE {key} > :last_id "
+                f"ORDER BY {key} LIMIT 1 OFFSET :offset"
+            ), {"last_id": last_id, "offset": batch_size - 1}).scalar()
+            if end is None:
+                end = max_id
+
+            bind.execute(sa.text(statement), {"start": last_id + 1, "end": end})
+            bind.execute(
+                sa.text(f"UPDATE {CHECKPOINT_TABLE} SET last_id = :last_id WHERE name = :name"),
+                {"name": name, "last_id": end},
+            )
+            last_id = end
+            batches += 1
+            logger.info("%s: backfilled %s up to %s=%s of %s", name, table_name, key, end, max_id)
+            if throttle:
+                time.sleep(throttle)
+
+    return batches
@@ -0,0 +1,35 @@
+"""Add vote rollups
+
+Revision ID: 3f9c2a7d41b8
+Revises: 1ba681882336
+Create Date: 2026-10-19 15:40:12.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a7d41b8'
+down_revision: Union[str, Sequence[str], None] = '1ba681882336'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('vote_rollups',
+    sa.Column('feature_id', sa.Integer(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['feature_id'], ['features.id'], ),
+    sa.PrimaryKeyConstraint('feature_id', 'bucket_start')
+    )
+    # Existing votes are folded in with `python -m app.rollups backfill`.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('vote_rollups')
@@ -0,0 +1,32 @@
+"""Add board locks
+
+Revision ID: 9e3b5d17a2c4
+Revises: d4a7f2c9e813
+Create Date: 2026-10-19 23:26:52.481930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3b5d17a2c4'
+down_revision: Union[str, Sequence[str], None] = 'd4a7f2c9e813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('board_locks',
+    sa.Column('board_id', sa.Integer(), nullable=False),
+    sa.Column('frozen', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('board_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('board_locks')
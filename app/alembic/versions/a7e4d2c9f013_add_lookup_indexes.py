@@ -0,0 +1,36 @@
+"""Add lookup indexes
+
+Revision ID: a7e4d2c9f013
+Revises: 3f9c2a7d41b8
+Create Date: 2026-10-19 16:20:41.530117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e4d2c9f013'
+down_revision: Union[str, Sequence[str], None] = '3f9c2a7d41b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_features_author_id'), 'features', ['author_id'], unique=False)
+    op.create_index(op.f('ix_features_created_at'), 'features', ['created_at'], unique=False)
+    op.create_index(op.f('ix_votes_user_id'), 'votes', ['user_id'], unique=False)
+    op.create_index(op.f('ix_votes_feature_id'), 'votes', ['feature_id'], unique=False)
+    op.create_index(op.f('ix_votes_created_at'), 'votes', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_votes_created_at'), table_name='votes')
+    op.drop_index(op.f('ix_votes_feature_id'), table_name='votes')
+    op.drop_index(op.f('ix_votes_user_id'), table_name='votes')
+    op.drop_index(op.f('ix_features_created_at'), table_name='features')
+    op.drop_index(op.f('ix_features_author_id'), table_name='features')
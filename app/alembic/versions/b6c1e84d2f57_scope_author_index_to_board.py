@@ -0,0 +1,32 @@
+"""Scope author index to board
+
+Revision ID: b6c1e84d2f57
+Revises: f3b9a06d5e21
+Create Date: 2026-10-19 21:14:37.208416
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.alembic.online import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6c1e84d2f57'
+down_revision: Union[str, Sequence[str], None] = 'f3b9a06d5e21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    drop_index_concurrently('ix_features_author_id', 'features')
+    create_index_concurrently('ix_features_author_id', 'features', ['author_id', 'board_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_features_author_id', 'features')
+    create_index_concurrently('ix_features_author_id', 'features', ['author_id'])
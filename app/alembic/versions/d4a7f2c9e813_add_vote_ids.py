@@ -0,0 +1,51 @@
+"""Add vote ids
+
+Revision ID: d4a7f2c9e813
+Revises: b6c1e84d2f57
+Create Date: 2026-10-19 22:41:09.613284
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.alembic.online import batched_backfill
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7f2c9e813'
+down_revision: Union[str, Sequence[str], None] = 'b6c1e84d2f57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('vote_ids',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('board_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_vote_ids_id'), 'vote_ids', ['id'], unique=False)
+
+    # Existing votes keep their ids; new ones are allocated after them
+    batched_backfill(
+        'vote_ids_seed',
+        'votes',
+        "INSERT INTO vote_ids (id, board_id) SELECT votes.id, features.board_id FROM votes "
+        "JOIN features ON features.id = votes.feature_id "
+        "WHERE votes.id BETWEEN :start AND :end AND votes.id NOT IN (SELECT id FROM vote_ids)",
+    )
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            "SELECT setval(pg_get_serial_sequence('vote_ids', 'id'), "
+            "COALESCE((SELECT MAX(id) FROM vote_ids), 0) + 1, false)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM migration_checkpoints WHERE name = 'vote_ids_seed'")
+    op.drop_index(op.f('ix_vote_ids_id'), table_name='vote_ids')
+    op.drop_table('vote_ids')
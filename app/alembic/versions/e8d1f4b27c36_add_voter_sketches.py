@@ -0,0 +1,33 @@
+"""Add voter sketches
+
+Revision ID: e8d1f4b27c36
+Revises: c52b8e1f6a94
+Create Date: 2026-10-19 18:12:44.208163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8d1f4b27c36'
+down_revision: Union[str, Sequence[str], None] = 'c52b8e1f6a94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('voter_sketches',
+    sa.Column('feature_id', sa.Integer(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('registers', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('feature_id', 'bucket_start')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('voter_sketches')
@@ -0,0 +1,75 @@
+"""Add boards
+
+Revision ID: f3b9a06d5e21
+Revises: e8d1f4b27c36
+Create Date: 2026-10-19 19:03:12.551874
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.alembic.online import batched_backfill, create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9a06d5e21'
+down_revision: Union[str, Sequence[str], None] = 'e8d1f4b27c36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('boards',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('slug', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('shard', sa.String(), nullable=False),
+    sa.Column('moving_to', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_boards_id'), 'boards', ['id'], unique=False)
+    op.create_index(op.f('ix_boards_slug'), 'boards', ['slug'], unique=True)
+    op.execute("INSERT INTO boards (id, slug, name, shard) VALUES (1, 'default', 'Default', 'default')")
+
+    op.create_table('feature_ids',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('board_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_feature_ids_id'), 'feature_ids', ['id'], unique=False)
+    op.create_index(op.f('ix_feature_ids_board_id'), 'feature_ids', ['board_id'], unique=False)
+
+    # A constant default: no table rewrite on PostgreSQL 11+
+    op.add_column('features', sa.Column('board_id', sa.Integer(), server_default='1', nullable=False))
+    create_index_concurrently('ix_features_board_id_id', 'features', ['board_id', 'id'])
+
+    # Existing features keep their ids; new ones are allocated after them
+    batched_backfill(
+        'feature_ids_seed',
+        'features',
+        "INSERT INTO feature_ids (id, board_id) SELECT id, board_id FROM features "
+        "WHERE id BETWEEN :start AND :end AND id NOT IN (SELECT id FROM feature_ids)",
+    )
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            "SELECT setval(pg_get_serial_sequence('feature_ids', 'id'), "
+            "COALESCE((SELECT MAX(id) FROM feature_ids), 0) + 1, false)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM migration_checkpoints WHERE name = 'feature_ids_seed'")
+    drop_index_concurrently('ix_features_board_id_id', 'features')
+    with op.batch_alter_table('features') as batch_op:
+        batch_op.drop_column('board_id')
+    op.drop_index(op.f('ix_feature_ids_board_id'), table_name='feature_ids')
+    op.drop_index(op.f('ix_feature_ids_id'), table_name='feature_ids')
+    op.drop_table('feature_ids')
+    op.drop_index(op.f('ix_boards_slug'), table_name='boards')
+    op.drop_index(op.f('ix_boards_id'), table_name='boards')
+    op.drop_table('boards')
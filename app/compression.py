@@ -0,0 +1,175 @@
+import gzip
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+from starlette.datastructures import Headers, MutableHeaders
+from app.negotiation import accepts_msgpack
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Only the first few pages of the feature list are hot enough to cache.
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "5"))
+RESPONSE_CACHE_MAX_PAGE = int(os.getenv("RESPONSE_CACHE_MAX_PAGE", "3"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "64"))
+CACHEABLE_PATHS = {"/features/"}
+
+def supported_encodings() -> List[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best encoding we support from an ``Accept-Encoding`` header."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in supported_encodings():
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+class CachedResponse:
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.created = time.monotonic()
+        self.variants: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def variant(self, encoding: str) -> bytes:
+        """Return the body compressed with ``encoding``, compressing only once."""
+        with self._lock:
+            if encoding not in self.variants:
+                self.variants[encoding] = compress(self.body, encoding)
+            return self.variants[encoding]
+
+class ResponseCache:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, CachedResponse] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry.created > self.ttl:
+                del self._entries[key]
+                entry = None
+            return entry
+
+    def put(self, key: str, entry: CachedResponse):
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                oldest = min(self._entries, key=lambda k: self._entries[k].created)
+                del self._entries[oldest]
+            self._entries[key] = entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+response_cache = ResponseCache(RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES)
+
+def cache_key(scope) -> Optional[str]:
+    if scope["method"] != "GET" or scope["path"] not in CACHEABLE_PATHS:
+        return None
+    query_string = scope.get("query_string", b"").decode("latin-1")
+    try:
+        page = int(parse_qs(query_string).get("page", ["1"])[0])
+    except ValueError:
+        return None
+    if page > RESPONSE_CACHE_MAX_PAGE:
+        return None
+    # JSON and MessagePack renderings of the same page are cached separately
+    accept = Headers(scope=scope).get("accept", "")
+    media = "msgpack" if accepts_msgpack(accept) else "json"
+    return f"{media}:{scope['path']}?{query_string}"
+
+class CompressionMiddleware:
+    """Negotiate gzip/brotli response compression.
+
+    Responses for the hottest list pages are also cached for a few seconds,
+    together with each compressed variant, so repeated requests skip both
+    the database and the compressor.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, cache: ResponseCache = response_cache):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        key = cache_key(scope) if self.cache.ttl > 0 else None
+
+        if key is not None:
+            entry = self.cache.get(key)
+            if entry is not None:
+                await self.send_entry(entry, encoding, send)
+                return
+
+        start_message = None
+        body = []
+
+        async def buffered_send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    entry = CachedResponse(
+                        start_message["status"], start_message["headers"], b"".join(body)
+                    )
+                    # Snapshot-served pages are already cached on disk, and
+                    # may be older than authenticated readers should see
+                    from_snapshot = any(name == b"x-snapshot-age" for name, _ in entry.headers)
+                    if key is not None and entry.status == 200 and not from_snapshot:
+                        self.cache.put(key, entry)
+                    await self.send_entry(entry, encoding, send)
+            else:
+                await send(message)
+
+        await self.app(scope, receive, buffered_send)
+
+    async def send_entry(self, entry: CachedResponse, encoding: Optional[str], send):
+        headers = MutableHeaders(raw=list(entry.headers))
+        body = entry.body
+        if encoding and len(body) >= self.minimum_size and "content-encoding" not in headers:
+            body = entry.variant(encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -8,12 +8,60 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# SQLite tuning, applied to every new connection. WAL lets readers run
+# alongside the writer, and NORMAL sync only fsyncs at checkpoints.
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-64000")),
+    "temp_store": "MEMORY",
+}
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def create_db_engine(url: str, writer: bool = False):
+    if not is_sqlite(url):
+        return create_engine(url)
+
+    kwargs = {}
+    if writer:
+        # SQLite allows a single writer at a time. Funnelling every write
+        # through one pooled connection queues writers in the pool instead
+        # of letting them race for the file lock and fail with
+        # "database is locked".
+        kwargs.update(
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+        )
+    engine = create_engine(
+        url,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+        },
+        **kwargs
+    )
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    return engine
+
+engine = create_db_engine(DATABASE_URL)
+# On SQLite writes go through a dedicated single-connection engine; other
+# databases handle concurrent writers themselves and share the main engine.
+writer_engine = create_db_engine(DATABASE_URL, writer=True) if is_sqlite(DATABASE_URL) else engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+WriteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
 Base = declarative_base()
 
 def get_db():
@@ -21,4 +69,11 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_write_db():
+    db = WriteSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from app.paths import match_route
+
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENT_ROUTES = {
+    ("POST", "/features/"),
+    ("POST", "/votes/"),
+    ("POST", "/boards/{slug}/features"),
+    ("POST", "/boards/{slug}/votes"),
+}
+
+class StoredResponse:
+    def __init__(self, fingerprint: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.created = time.monotonic()
+
+class IdempotencyStore:
+    """LRU of first responses per idempotency key, expiring after ``ttl``.
+
+    Entries live in worker memory, so a retry routed to another worker
+    executes again; mobile clients generally retry on the same connection.
+    """
+
+    SWEEP_EVERY = 256
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.created > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: StoredResponse):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._puts += 1
+            if self._puts % self.SWEEP_EVERY == 0:
+                cutoff = time.monotonic() - self.ttl
+                for expired in [k for k, e in self._entries.items() if e.created < cutoff]:
+                    del self._entries[expired]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+idempotency_store = IdempotencyStore(IDEMPOTENCY_TTL, IDEMPOTENCY_MAX_ENTRIES)
+
+def should_store(status: int) -> bool:
+    # Server errors and throttling are transient; let the retry run again
+    return status < 500 and status != 429
+
+class IdempotencyMiddleware:
+    """Replay the first response for a repeated ``Idempotency-Key``.
+
+    Keys are scoped to the caller's credentials and the route. A request
+    that arrives while the first one with the same key is still running
+    waits for it and replays its response instead of executing twice.
+    """
+
+    def __init__(self, app, store: IdempotencyStore = idempotency_store):
+        self.app = app
+        self.store = store
+        self._in_flight: Dict[str, asyncio.Event] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or match_route(IDEMPOTENT_ROUTES, scope["method"], scope["path"]) is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get("idempotency-key")
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            response = JSONResponse({"detail": "Invalid Idempotency-Key"}, status_code=400)
+            await response(scope, receive, send)
+            return
+
+        # Read the whole body up front to fingerprint it, then hand the same
+        # messages to the application
+        messages = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            messages.append(message)
+            more_body = message.get("more_body", False) and message["type"] == "http.request"
+        fingerprint = hashlib.sha256(b"".join(m.get("body", b"") for m in messages)).hexdigest()
+
+        async def replay_receive():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        credentials = hashlib.sha256(headers.get("authorization", "").encode()).hexdigest()
+        key = f"{credentials}:{scope['method']}:{scope['path']}:{idempotency_key}"
+
+        while True:
+            stored = self.store.get(key)
+            if stored is not None:
+                await self.replay(stored, fingerprint, scope, replay_receive, send)
+                return
+            event = self._in_flight.get(key)
+            if event is None:
+                break
+            await event.wait()
+
+        event = self._in_flight[key] = asyncio.Event()
+        try:
+            await self.execute(key, fingerprint, scope, replay_receive, send)
+        finally:
+            del self._in_flight[key]
+            event.set()
+
+    async def execute(self, key: str, fingerprint: str, scope, receive, send):
+        start_message = None
+        body = []
+
+        async def recording_send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+                if not message.get("more_body", False) and should_store(start_message["status"]):
+                    self.store.put(key, StoredResponse(
+                        fingerprint, start_message["status"], start_message["headers"], b"".join(body)
+                    ))
+            await send(message)
+
+        await self.app(scope, receive, recording_send)
+
+    async def replay(self, stored: StoredResponse, fingerprint: str, scope, receive, send):
+        if stored.fingerprint != fingerprint:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key was already used with a different request body"},
+                status_code=422,
+            )
+            await response(scope, receive, send)
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": stored.headers + [(b"idempotency-replayed", b"true")],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
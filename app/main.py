@@ -1,8 +1,49 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, features, votes
+from app import outbox, sharding, snapshots
+from app.compression import CompressionMiddleware
+from app.database import SessionLocal
+from app.idempotency import IdempotencyMiddleware
+from app.profiling import ProfilingMiddleware
+from app.ratelimit import RateLimitMiddleware
+from app.routers import analytics, auth, boards, features, users, votes
 
-app = FastAPI(title="MetaCTO API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background workers run for the lifetime of the process
+    tasks = []
+    if snapshots.SNAPSHOT_ENABLED:
+        tasks.append(asyncio.create_task(snapshots.run_publisher(SessionLocal)))
+    if outbox.OUTBOX_DISPATCHER_ENABLED:
+        # Events are written to the outbox of the shard they happened on
+        for shard in sharding.shards.values():
+            tasks.append(asyncio.create_task(outbox.run_dispatcher(shard.WriteSessionLocal)))
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+app = FastAPI(title="MetaCTO API", version="1.0.0", lifespan=lifespan)
+
+# Replay retried POSTs carrying an Idempotency-Key; innermost so the stored
+# body is the uncompressed one
+app.add_middleware(IdempotencyMiddleware)
+
+# Serve anonymous list pages from snapshots, and all of them when the
+# database is down
+app.add_middleware(snapshots.SnapshotMiddleware)
+
+# Compress responses (and cache hot list pages) inside CORS so cached
+# responses still get CORS headers
+app.add_middleware(CompressionMiddleware)
+
+# Throttle expensive endpoints before they reach bcrypt or the database
+app.add_middleware(RateLimitMiddleware)
+
+# Opt-in per-request profiling (X-Profile header or PROFILE_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
 
 # Configure CORS
 app.add_middleware(
@@ -16,6 +57,9 @@ app.add_middleware(
 app.include_router(auth.router)
 app.include_router(features.router)
 app.include_router(votes.router)
+app.include_router(users.router)
+app.include_router(boards.router)
+app.include_router(analytics.router)
 
 @app.get("/")
 def read_root():
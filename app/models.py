@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, ForeignKey, Index, LargeBinary
 from sqlalchemy.sql import func
+from datetime import datetime
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 from app.database import Base
@@ -17,14 +18,45 @@ class User(Base):
     features = relationship("Feature", back_populates="author")
     votes = relationship("Vote", back_populates="user")
 
+class Board(Base):
+    __tablename__ = "boards"
+    
+    # Boards live in the global database alongside users; shard names the
+    # database (see app/sharding.py) holding the board's features and votes
+    id = Column(Integer, primary_key=True, index=True)
+    slug = Column(String, unique=True, index=True, nullable=False)
+    name = Column(String, nullable=False)
+    shard = Column(String, nullable=False, default="default")
+    # Set while a rebalance is finishing; writes to the board are refused
+    moving_to = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class FeatureId(Base):
+    __tablename__ = "feature_ids"
+    
+    # Feature ids are allocated here, in the global database, so they stay
+    # unique across shards and a board can move without renumbering
+    id = Column(Integer, primary_key=True, index=True)
+    board_id = Column(Integer, nullable=False, index=True)
+
+class VoteId(Base):
+    __tablename__ = "vote_ids"
+    
+    # Vote ids are allocated globally too, so cursors and ids held by
+    # clients still point at the same votes after a board moves
+    id = Column(Integer, primary_key=True, index=True)
+    board_id = Column(Integer, nullable=False)
+
 class Feature(Base):
     __tablename__ = "features"
     
     id = Column(Integer, primary_key=True, index=True)
+    # No foreign key: boards are global while features may be on another shard
+    board_id = Column(Integer, nullable=False, server_default="1")
     title = Column(String, nullable=False)
     description = Column(Text)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     author = relationship("User", back_populates="features")
@@ -33,14 +65,66 @@ class Feature(Base):
     @hybrid_property
     def vote_count(self):
         return len(self.votes)
+    
+    __table_args__ = (
+        Index("ix_features_board_id_id", "board_id", "id"),
+        # User listings are per board
+        Index("ix_features_author_id", "author_id", "board_id"),
+    )
 
 class Vote(Base):
     __tablename__ = "votes"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    feature_id = Column(Integer, ForeignKey("features.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    feature_id = Column(Integer, ForeignKey("features.id"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     
     user = relationship("User", back_populates="votes")
-    feature = relationship("Feature", back_populates="votes")
\ No newline at end of file
+    feature = relationship("Feature", back_populates="votes")
+
+class VoteRollup(Base):
+    __tablename__ = "vote_rollups"
+    
+    # Hourly vote counts per feature, kept in step with the votes table so
+    # time-series stats never have to scan raw votes.
+    feature_id = Column(Integer, ForeignKey("features.id"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class VoterSketch(Base):
+    __tablename__ = "voter_sketches"
+    
+    # Daily HyperLogLog sketch of distinct voters for a feature, or for one
+    # stripe of all voters when feature_id is negative (see app/sketches.py)
+    feature_id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    registers = Column(LargeBinary, nullable=False)
+
+class BoardLock(Base):
+    __tablename__ = "board_locks"
+    
+    # One row per board on each shard it has been on. Writes share-lock it
+    # for their whole transaction; a move takes it exclusively to freeze the
+    # board there (see app/sharding.py)
+    board_id = Column(Integer, primary_key=True)
+    frozen = Column(Boolean, nullable=False, default=False)
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+    
+    # Side effects of a write, recorded in the same transaction and
+    # delivered afterwards by the dispatcher in app/outbox.py
+    id = Column(Integer, primary_key=True, index=True)
+    topic = Column(String, nullable=False)
+    aggregate_id = Column(Integer, nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = Column(DateTime)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    
+    __table_args__ = (
+        Index("ix_outbox_events_pending", "processed_at", "available_at"),
+    )
\ No newline at end of file
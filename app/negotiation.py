@@ -0,0 +1,113 @@
+import asyncio
+import functools
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; without it every response is JSON
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+_wants_msgpack: ContextVar[bool] = ContextVar("wants_msgpack", default=False)
+
+def accepts_msgpack(accept: str) -> bool:
+    """True if the ``Accept`` header prefers MessagePack to JSON."""
+    if msgpack is None or "msgpack" not in accept:
+        return False
+    qualities = {}
+    for part in accept.split(","):
+        media_type, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[media_type.strip().lower()] = quality
+    msgpack_quality = max(qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    json_quality = qualities.get("application/json", qualities.get("*/*", 0.0))
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+def _encode(value):
+    # Datetimes become MessagePack timestamps (8-12 bytes instead of a
+    # 20-odd character ISO string). Naive values from SQLite are UTC.
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return msgpack.Timestamp.from_datetime(value)
+    # Plain dates have no MessagePack type; send them as in JSON
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+def packb(content) -> bytes:
+    return msgpack.packb(content, default=_encode)
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content) -> bytes:
+        return packb(content)
+
+class NegotiatedRoute(APIRoute):
+    """Route that answers ``Accept: application/msgpack`` with MessagePack.
+
+    The endpoint's return value is packed directly, skipping the JSON
+    encoder, so datetimes keep their type and become native timestamps.
+    JSON stays the default, and errors are always JSON.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        self._response_adapter = None
+        super().__init__(path, self._negotiated(endpoint), **kwargs)
+
+    def response_adapter(self) -> TypeAdapter:
+        if self._response_adapter is None:
+            self._response_adapter = TypeAdapter(self.response_model)
+        return self._response_adapter
+
+    def _negotiated(self, endpoint):
+        def to_response(result):
+            if not _wants_msgpack.get() or isinstance(result, Response):
+                return result
+            if self.response_model is not None:
+                # Validate and dump like the JSON path does, so ORM objects
+                # (including inside lists) become plain data; python mode
+                # keeps datetimes for _encode
+                adapter = self.response_adapter()
+                result = adapter.dump_python(adapter.validate_python(result, from_attributes=True))
+            return MsgPackResponse(result)
+
+        if asyncio.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def async_endpoint(*args, **kwargs):
+                return to_response(await endpoint(*args, **kwargs))
+            return async_endpoint
+
+        @functools.wraps(endpoint)
+        def sync_endpoint(*args, **kwargs):
+            return to_response(endpoint(*args, **kwargs))
+        return sync_endpoint
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            token = _wants_msgpack.set(accepts_msgpack(request.headers.get("accept", "")))
+            try:
+                response = await handler(request)
+            finally:
+                _wants_msgpack.reset(token)
+            response.headers.append("Vary", "Accept")
+            return response
+
+        return route_handler
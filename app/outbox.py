@@ -0,0 +1,154 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+from sqlalchemy.orm import Session
+from app.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DISPATCHER_ENABLED = os.getenv("OUTBOX_DISPATCHER_ENABLED", "true").lower() == "true"
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "2"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "300"))
+# Claimed events are hidden from other dispatchers for this long; a
+# dispatcher that dies mid-batch has its events picked up again afterwards
+OUTBOX_LEASE = timedelta(seconds=float(os.getenv("OUTBOX_LEASE_SECONDS", "60")))
+# Delivered events are kept this long for inspection, then purged
+OUTBOX_RETENTION = timedelta(hours=float(os.getenv("OUTBOX_RETENTION_HOURS", "24")))
+OUTBOX_PURGE_INTERVAL = 300
+
+# Handlers are called as handler(aggregate_id, payloads) with every pending
+# event for that topic and aggregate in the claimed batch, oldest first.
+Handler = Callable[[int, List[dict]], None]
+handlers: Dict[str, List[Handler]] = defaultdict(list)
+
+def register(topic: str):
+    """Decorator subscribing a handler to an outbox topic."""
+    def decorator(handler: Handler) -> Handler:
+        handlers[topic].append(handler)
+        return handler
+    return decorator
+
+def enqueue(db: Session, topic: str, aggregate_id: int, payload: dict):
+    """Record an event in the caller's transaction; it is only dispatched
+    if that transaction commits."""
+    db.add(OutboxEvent(topic=topic, aggregate_id=aggregate_id, payload=json.dumps(payload)))
+
+def backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE ** attempts))
+
+def claim_batch(session_factory, batch_size: int):
+    """Lease up to ``batch_size`` due events in one short transaction.
+
+    The lease is written to ``available_at``, which also serves as the
+    token proving the lease is still ours when the outcome is recorded.
+    On PostgreSQL ``FOR UPDATE SKIP LOCKED`` keeps concurrent dispatchers
+    from claiming the same rows.
+    """
+    db = session_factory()
+    try:
+        now = datetime.utcnow()
+        lease_until = now + OUTBOX_LEASE
+        events = db.query(OutboxEvent).filter(
+            OutboxEvent.processed_at.is_(None),
+            OutboxEvent.available_at <= now,
+        ).order_by(OutboxEvent.id).limit(batch_size).with_for_update(skip_locked=True).all()
+        claimed = [
+            (event.id, event.topic, event.aggregate_id, event.payload, event.attempts)
+            for event in events
+        ]
+        for event in events:
+            event.available_at = lease_until
+        db.commit()
+        return lease_until, claimed
+    finally:
+        db.close()
+
+def record_outcome(session_factory, lease_until: datetime, delivered: List[int], failed: List[tuple]):
+    """Mark delivered and failed events, skipping any whose lease expired
+    and was taken over by another dispatcher."""
+    db = session_factory()
+    try:
+        now = datetime.utcnow()
+        if delivered:
+            db.query(OutboxEvent).filter(
+                OutboxEvent.id.in_(delivered),
+                OutboxEvent.available_at == lease_until,
+            ).update({"processed_at": now}, synchronize_session=False)
+        for event_id, attempts, error in failed:
+            values = {"attempts": attempts, "last_error": error}
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                # Give up; the event stays in the table with its error
+                values["processed_at"] = now
+            else:
+                values["available_at"] = now + backoff(attempts)
+            db.query(OutboxEvent).filter(
+                OutboxEvent.id == event_id,
+                OutboxEvent.available_at == lease_until,
+            ).update(values, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def dispatch_once(session_factory, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Claim and deliver one batch of due events. Returns how many were claimed.
+
+    Handlers run between two short transactions with no connection held,
+    so slow side effects never hold row locks or the SQLite writer
+    connection that request writes queue on.
+    """
+    lease_until, claimed = claim_batch(session_factory, batch_size)
+    if not claimed:
+        return 0
+
+    groups = defaultdict(list)
+    for event in claimed:
+        groups[(event[1], event[2])].append(event)
+
+    delivered, failed = [], []
+    for (topic, aggregate_id), group in groups.items():
+        try:
+            payloads = [json.loads(event[3]) for event in group]
+            for handler in handlers.get(topic, []):
+                handler(aggregate_id, payloads)
+        except Exception as exc:
+            failed += [(event[0], event[4] + 1, repr(exc)) for event in group]
+            logger.exception("Outbox handler failed for %s %s", topic, aggregate_id)
+        else:
+            delivered += [event[0] for event in group]
+
+    record_outcome(session_factory, lease_until, delivered, failed)
+    return len(claimed)
+
+def purge_processed(session_factory) -> int:
+    db = session_factory()
+    try:
+        deleted = db.query(OutboxEvent).filter(
+            OutboxEvent.processed_at < datetime.utcnow() - OUTBOX_RETENTION
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    finally:
+        db.close()
+
+async def run_dispatcher(session_factory):
+    """Deliver outbox events until cancelled, polling when the queue is empty."""
+    last_purge = time.monotonic()
+    while True:
+        try:
+            claimed = await asyncio.to_thread(dispatch_once, session_factory)
+            if claimed:
+                continue
+            if time.monotonic() - last_purge > OUTBOX_PURGE_INTERVAL:
+                await asyncio.to_thread(purge_processed, session_factory)
+                last_purge = time.monotonic()
+        except Exception:
+            logger.exception("Outbox dispatch failed")
+        await asyncio.sleep(OUTBOX_POLL_INTERVAL)
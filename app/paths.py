@@ -0,0 +1,20 @@
+import re
+from functools import lru_cache
+from typing import Collection, Optional, Tuple
+
+@lru_cache(maxsize=None)
+def path_pattern(template: str) -> "re.Pattern[str]":
+    # Each {param} matches one path segment, as in the routers
+    return re.compile("^" + re.sub(r"\\\{[^/]+?\\\}", "[^/]+", re.escape(template)) + "$")
+
+def match_route(routes: Collection[Tuple[str, str]], method: str, path: str) -> Optional[Tuple[str, str]]:
+    """Find the ``(method, path)`` key matching a request.
+
+    Keys are exact paths or templates such as ``/boards/{slug}/votes``.
+    """
+    if (method, path) in routes:
+        return method, path
+    for route_method, template in routes:
+        if route_method == method and "{" in template and path_pattern(template).match(path):
+            return route_method, template
+    return None
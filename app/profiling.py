@@ -0,0 +1,228 @@
+import json
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+# Admin secret that enables profiling through the X-Profile header
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+
+current_profile: ContextVar[Optional["Profile"]] = ContextVar("current_profile", default=None)
+
+# Leaf frames in these files mean the event loop is idle, not working for us
+_IDLE_FILES = ("selectors.py", "base_events.py")
+
+class Profile:
+    def __init__(self, method: str, path: str, query: str):
+        self.id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.query = query
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.status = None
+        self.samples: Counter = Counter()
+        self.sql: List[dict] = []
+        # Threads doing work for this request, counted: the event loop thread
+        # plus worker threads while they hold one of its connections, so a
+        # worker isn't charged for later requests it serves
+        self.threads: Counter = Counter({threading.get_ident(): 1})
+        self._threads_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True, name=f"profiler-{self.id}")
+
+    def start(self):
+        self._sampler.start()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.started
+        self._stopped.set()
+        self._sampler.join()
+        with self._threads_lock:
+            self.threads.clear()
+
+    def enter(self, ident: int):
+        with self._threads_lock:
+            self.threads[ident] += 1
+
+    def leave(self, ident: int):
+        with self._threads_lock:
+            self.threads[ident] -= 1
+            if self.threads[ident] <= 0:
+                del self.threads[ident]
+
+    def _sample(self):
+        while True:
+            frames = sys._current_frames()
+            with self._threads_lock:
+                threads = list(self.threads)
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is None or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+            if self._stopped.wait(PROFILE_INTERVAL):
+                return
+
+    def write(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.id)
+        with open(f"{base}.collapsed", "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(f"{base}.json", "w") as f:
+            json.dump({
+                "id": self.id,
+                "method": self.method,
+                "path": self.path,
+                "query": self.query,
+                "status": self.status,
+                "duration_ms": round(self.duration * 1000, 3),
+                "interval_ms": PROFILE_INTERVAL * 1000,
+                "samples": sum(self.samples.values()),
+                "sql_ms": round(sum(q["duration_ms"] for q in self.sql), 3),
+                "sql": self.sql,
+            }, f, indent=2)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is None:
+        return
+    conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is None:
+        return
+    started = conn.info["profile_query_start"].pop()
+    profile.sql.append({
+        "statement": statement,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        "offset_ms": round((started - profile.started) * 1000, 3),
+    })
+
+@event.listens_for(Pool, "checkout")
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    profile = current_profile.get()
+    if profile is None:
+        return
+    ident = threading.get_ident()
+    connection_record.info["profile_thread"] = (profile, ident)
+    profile.enter(ident)
+
+@event.listens_for(Pool, "checkin")
+def _checkin(dbapi_connection, connection_record):
+    # Connections are often returned from another thread, e.g. by a
+    # dependency's teardown, so the thread that took it is looked up
+    if connection_record is None:
+        return
+    entry = connection_record.info.pop("profile_thread", None)
+    if entry is not None:
+        profile, ident = entry
+        profile.leave(ident)
+
+def should_profile(headers: Headers) -> bool:
+    token = headers.get("x-profile")
+    if token and PROFILE_TOKEN and secrets.compare_digest(token, PROFILE_TOKEN):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (PROFILE_TOKEN or PROFILE_SAMPLE_RATE > 0):
+            await self.app(scope, receive, send)
+            return
+        if not should_profile(Headers(scope=scope)):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(
+            scope["method"], scope["path"], scope.get("query_string", b"").decode("latin-1")
+        )
+
+        async def profiled_send(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Profile-Id"] = profile.id
+            await send(message)
+
+        token = current_profile.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            profile.stop()
+            current_profile.reset(token)
+            # File writes would block the event loop
+            await run_in_threadpool(profile.write, PROFILE_DIR)
+
+def list_profiles(directory: str = PROFILE_DIR) -> List[dict]:
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name)) as f:
+                profiles.append(json.load(f))
+    return profiles
+
+def summarize(profile_id: str, directory: str = PROFILE_DIR, top: int = 10) -> str:
+    with open(os.path.join(directory, f"{profile_id}.json")) as f:
+        meta = json.load(f)
+    self_samples: Counter = Counter()
+    with open(os.path.join(directory, f"{profile_id}.collapsed")) as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            self_samples[stack.split(";")[-1]] += int(count)
+
+    lines = [
+        f"{meta['method']} {meta['path']}{'?' + meta['query'] if meta['query'] else ''} -> {meta['status']}",
+        f"duration {meta['duration_ms']} ms, {meta['samples']} samples, "
+        f"{len(meta['sql'])} queries taking {meta['sql_ms']} ms",
+        "",
+        "Top frames (self samples):",
+    ]
+    for frame, count in self_samples.most_common(top):
+        lines.append(f"  {count:6d}  {frame}")
+    lines += ["", "Slowest queries:"]
+    for query in sorted(meta["sql"], key=lambda q: q["duration_ms"], reverse=True)[:top]:
+        statement = " ".join(query["statement"].split())
+        lines.append(f"  {query['duration_ms']:9.3f} ms  {statement[:120]}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["list"]:
+        for meta in list_profiles():
+            print(f"{meta['id']}  {meta['duration_ms']:9.3f} ms  {meta['status']}  "
+                  f"{meta['method']} {meta['path']}  ({len(meta['sql'])} queries)")
+    elif sys.argv[1:2] == ["show"] and len(sys.argv) == 3:
+        print(summarize(sys.argv[2]))
+    else:
+        print("usage: python -m app.profiling list | show <id>")
+        sys.exit(2)
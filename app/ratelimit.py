@@ -0,0 +1,168 @@
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from jose import JWTError, jwt
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from app.auth import ALGORITHM, SECRET_KEY
+from app.paths import match_route
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Set to share buckets between workers, e.g. redis://localhost:6379/0
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+
+def parse_limit(value: str) -> Tuple[int, float]:
+    """Parse ``"<requests>/<seconds>"`` into a bucket capacity and period."""
+    capacity, _, period = value.partition("/")
+    return int(capacity), float(period or 1)
+
+class RateLimit:
+    def __init__(self, name: str, limit: str, key: str):
+        self.name = name
+        self.capacity, self.period = parse_limit(limit)
+        self.refill_rate = self.capacity / self.period
+        # "ip" buckets per client address, "user" per JWT subject (falling
+        # back to the address for anonymous requests)
+        self.key = key
+
+VOTE_RATE_LIMIT = RateLimit("vote", os.getenv("RATE_LIMIT_VOTE", "30/60"), "user")
+
+# Paths may be route templates; limits with the same name share a bucket
+RATE_LIMITS: Dict[Tuple[str, str], RateLimit] = {
+    ("POST", "/auth/login"): RateLimit("login", os.getenv("RATE_LIMIT_LOGIN", "10/60"), "ip"),
+    ("POST", "/auth/register"): RateLimit("register", os.getenv("RATE_LIMIT_REGISTER", "10/600"), "ip"),
+    ("POST", "/votes/"): VOTE_RATE_LIMIT,
+    ("POST", "/boards/{slug}/votes"): VOTE_RATE_LIMIT,
+}
+
+class InMemoryBackend:
+    """Token buckets held in process memory; limits apply per worker."""
+
+    def __init__(self, max_keys: int = 100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + (now - updated) * limit.refill_rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (1 - tokens) / limit.refill_rate
+            if len(self._buckets) > self.max_keys:
+                self._evict(now)
+        return allowed, retry_after
+
+    def _evict(self, now: float):
+        # Buckets idle for a long time are as good as full; forget them
+        cutoff = now - max(limit.period for limit in RATE_LIMITS.values())
+        for key in [key for key, (_, updated) in self._buckets.items() if updated < cutoff]:
+            del self._buckets[key]
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+class RedisBackend:
+    """Token buckets in Redis, shared by every worker pointing at it."""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(retry_after)}
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the redis package is not installed")
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        allowed, retry_after = await self.script(
+            keys=[f"ratelimit:{key}"], args=[limit.capacity, limit.refill_rate]
+        )
+        return bool(allowed), float(retry_after)
+
+    def reset(self):
+        pass
+
+def create_backend():
+    if RATE_LIMIT_REDIS_URL:
+        return RedisBackend(RATE_LIMIT_REDIS_URL)
+    return InMemoryBackend()
+
+def client_identity(scope, limit: RateLimit) -> str:
+    if limit.key == "user":
+        # Decoding the JWT is a cheap HMAC check; looking the user up would
+        # cost the database round trip we are trying to protect
+        authorization = Headers(scope=scope).get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                subject = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+            except JWTError:
+                subject = None
+            if subject:
+                return f"user:{subject}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+class RateLimitMiddleware:
+    """Reject over-limit requests with 429 before any body parsing,
+    password hashing or database access happens."""
+
+    def __init__(self, app, backend=None, limits: Optional[Dict[Tuple[str, str], RateLimit]] = None):
+        self.app = app
+        self.backend = backend if backend is not None else rate_limit_backend
+        self.limits = limits if limits is not None else RATE_LIMITS
+
+    async def __call__(self, scope, receive, send):
+        limit = None
+        if scope["type"] == "http" and RATE_LIMIT_ENABLED:
+            route = match_route(self.limits, scope["method"], scope["path"])
+            limit = self.limits[route] if route else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = f"{limit.name}:{client_identity(scope, limit)}"
+        allowed, retry_after = await self.backend.take(key, limit)
+        if not allowed:
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+rate_limit_backend = create_backend()
@@ -0,0 +1,132 @@
+import re
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models import Vote, VoteRollup
+
+BUCKET_SIZE = timedelta(hours=1)
+MAX_STATS_BUCKETS = 1000
+# Coarser buckets than this are rejected; 24 of them already span 24 years
+MAX_RESOLUTION_HOURS = 24 * 366
+
+_RESOLUTION_UNITS = {"h": 1, "d": 24, "w": 24 * 7}
+_RESOLUTION_PATTERN = re.compile(r"^(\d+)([hdw])$")
+
+def to_utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def bucket_for(value: datetime) -> datetime:
+    return to_utc_naive(value).replace(minute=0, second=0, microsecond=0)
+
+def parse_resolution(resolution: str) -> Optional[timedelta]:
+    match = _RESOLUTION_PATTERN.match(resolution)
+    if not match:
+        return None
+    hours = int(match.group(1)) * _RESOLUTION_UNITS[match.group(2)]
+    if not 0 < hours <= MAX_RESOLUTION_HOURS:
+        return None
+    return timedelta(hours=hours)
+
+def record_vote(db: Session, feature_id: int, created_at: datetime, delta: int = 1):
+    """Add ``delta`` to the hourly rollup containing ``created_at``.
+
+    Runs inside the caller's transaction so the rollup commits (or rolls
+    back) together with the vote itself.
+    """
+    bucket_start = bucket_for(created_at)
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(VoteRollup).values(
+            feature_id=feature_id, bucket_start=bucket_start, count=delta
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VoteRollup.feature_id, VoteRollup.bucket_start],
+            set_={"count": VoteRollup.count + delta},
+        )
+        db.execute(stmt)
+        return
+
+    result = db.execute(
+        update(VoteRollup)
+        .where(
+            VoteRollup.feature_id == feature_id,
+            VoteRollup.bucket_start == bucket_start,
+        )
+        .values(count=VoteRollup.count + delta)
+    )
+    if result.rowcount == 0:
+        db.add(VoteRollup(feature_id=feature_id, bucket_start=bucket_start, count=delta))
+
+def get_vote_buckets(
+    db: Session,
+    feature_id: int,
+    start: datetime,
+    end: datetime,
+    resolution: timedelta,
+):
+    """Return vote counts for ``[start, end)`` grouped into ``resolution`` buckets.
+
+    ``start`` is aligned down to the hour. Empty buckets are included with a
+    count of zero so clients can plot the series directly.
+    """
+    start = bucket_for(start)
+    end = to_utc_naive(end)
+
+    rows = db.query(VoteRollup.bucket_start, VoteRollup.count).filter(
+        VoteRollup.feature_id == feature_id,
+        VoteRollup.bucket_start >= start,
+        VoteRollup.bucket_start < end,
+    ).all()
+
+    bucket_count = max(0, -(-(end - start) // resolution))
+    counts = [0] * bucket_count
+    for bucket_start, count in rows:
+        counts[(bucket_start - start) // resolution] += count
+
+    return [
+        {"start": start + i * resolution, "count": count}
+        for i, count in enumerate(counts)
+    ]
+
+def backfill(db: Session, batch_size: int = 10000) -> int:
+    """Rebuild every rollup row from the raw votes table.
+
+    Returns the number of hourly buckets written.
+    """
+    totals = defaultdict(int)
+    votes = db.query(Vote.feature_id, Vote.created_at).execution_options(
+        yield_per=batch_size
+    )
+    for feature_id, created_at in votes:
+        if created_at is not None:
+            totals[(feature_id, bucket_for(created_at))] += 1
+
+    db.query(VoteRollup).delete()
+    db.bulk_insert_mappings(VoteRollup, [
+        {"feature_id": feature_id, "bucket_start": bucket_start, "count": count}
+        for (feature_id, bucket_start), count in totals.items()
+    ])
+    db.commit()
+    return len(totals)
+
+if __name__ == "__main__":
+    from app.database import WriteSessionLocal
+
+    if sys.argv[1:] != ["backfill"]:
+        print("usage: python -m app.rollups backfill")
+        sys.exit(2)
+
+    db = WriteSessionLocal()
+    try:
+        written = backfill(db)
+    finally:
+        db.close()
+    print(f"Backfilled {written} hourly vote buckets")
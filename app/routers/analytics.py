@@ -0,0 +1,60 @@
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.database import get_db
+from app.negotiation import NegotiatedRoute
+from app.models import Board, FeatureId
+from app.sharding import DEFAULT_SHARD, get_shard, shards
+from app.sketches import HLL_RELATIVE_ERROR, HyperLogLog, voter_sketch
+
+router = APIRouter(prefix="/analytics", tags=["analytics"], route_class=NegotiatedRoute)
+
+DEFAULT_WINDOW_DAYS = 7
+MAX_WINDOW_DAYS = 366
+
+@router.get("/unique-voters", response_model=dict)
+def get_unique_voters(
+    feature_id: Optional[int] = Query(None, description="Count voters of one feature instead of all features"),
+    start: Optional[date] = Query(None, description="First day (UTC), defaults to a week before end"),
+    end: Optional[date] = Query(None, description="Last day (UTC), defaults to today"),
+    db: Session = Depends(get_db)
+):
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=DEFAULT_WINDOW_DAYS - 1)
+    if start > end or (end - start).days >= MAX_WINDOW_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"start must be on or before end, at most {MAX_WINDOW_DAYS} days apart"
+        )
+
+    if feature_id is None:
+        # Each shard keeps its own global stripes; their union counts every
+        # voter once, including boards caught mid-move on two shards
+        sketch = HyperLogLog()
+        for shard in shards.values():
+            shard_db = shard.SessionLocal()
+            try:
+                sketch.merge(voter_sketch(shard_db, None, start, end))
+            finally:
+                shard_db.close()
+    else:
+        board = db.query(Board.shard).join(FeatureId, FeatureId.board_id == Board.id).filter(
+            FeatureId.id == feature_id
+        ).first()
+        shard_db = get_shard(board.shard if board else DEFAULT_SHARD).SessionLocal()
+        try:
+            sketch = voter_sketch(shard_db, feature_id, start, end)
+        finally:
+            shard_db.close()
+
+    estimate = sketch.estimate()
+    return {
+        "feature_id": feature_id,
+        "start": start,
+        "end": end,
+        "unique_voters": estimate,
+        "is_estimate": True,
+        # One standard error; about 95% of estimates fall within twice this
+        "relative_error": round(HLL_RELATIVE_ERROR, 4)
+    }
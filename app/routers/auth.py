@@ -2,7 +2,7 @@ from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_write_db
 from app.models import User
 from app.schemas import UserCreate, UserResponse, Token
 from app.auth import (
@@ -12,11 +12,12 @@ from app.auth import (
     get_user_by_email,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from app.negotiation import NegotiatedRoute
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=NegotiatedRoute)
 
 @router.post("/register", response_model=UserResponse)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+def register_user(user: UserCreate, db: Session = Depends(get_write_db)):
     db_user = get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(
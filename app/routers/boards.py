@@ -0,0 +1,194 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import List, Optional
+from app.database import get_db, get_write_db
+from app.models import Board, Feature, User
+from app.schemas import BoardCreate, BoardResponse, FeatureCreate, VoteCreate, VoteResponse
+from app.auth import get_current_user
+from app.negotiation import NegotiatedRoute
+from app.compression import response_cache
+from app.sharding import BOARD_DEFAULT_SHARD, DEFAULT_SHARD, allocate_feature_id, get_board, get_board_db, get_board_write_db
+from app.routers.features import FEATURE_FIELDS, add_feature, feature_query, parse_fields, parse_include, serialize_feature
+from app.routers.votes import cast_vote, withdraw_vote
+
+router = APIRouter(prefix="/boards", tags=["boards"], route_class=NegotiatedRoute)
+
+# Board routes read and write one shard, the board's. Authors come from the
+# global users table in a second query instead of a join.
+
+def invalidate_cached_lists(board: Board):
+    # The cached /features/ pages are read from the default shard
+    if board.shard == DEFAULT_SHARD:
+        response_cache.clear()
+
+def id_session(board: Board, global_db: Session, db: Session) -> Session:
+    # On the default shard the global tables sit behind the same writer, so
+    # ids are allocated in the write's own session and transaction; a second
+    # writer session there would wait on the single-connection pool
+    return db if board.shard == DEFAULT_SHARD else global_db
+
+def serialize_author(user) -> dict:
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "created_at": user.created_at
+    }
+
+def serialize_board_features(users_db: Session, rows, fields: List[str], include_author: bool) -> List[dict]:
+    items = [serialize_feature(row, fields, False) for row in rows]
+    if include_author:
+        author_ids = {row.author_id for row in rows}
+        authors = {
+            user.id: user
+            for user in users_db.query(User.id, User.name, User.email, User.created_at).filter(
+                User.id.in_(author_ids)
+            )
+        }
+        for row, item in zip(rows, items):
+            author = authors.get(row.author_id)
+            item["author"] = serialize_author(author) if author else None
+    return items
+
+def board_feature_query(db: Session, board: Board, fields: List[str], include_author: bool):
+    # author_id is needed to look the author up even when it isn't returned
+    columns = fields + ["author_id"] if include_author and "author_id" not in fields else fields
+    return feature_query(db, columns, False, board.id)
+
+@router.get("/", response_model=List[BoardResponse])
+def list_boards(db: Session = Depends(get_db)):
+    return db.query(Board).order_by(Board.id).all()
+
+@router.post("/", response_model=BoardResponse)
+def create_board(
+    board: BoardCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_write_db)
+):
+    if db.query(Board.id).filter(Board.slug == board.slug).first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Board already exists"
+        )
+
+    db_board = Board(slug=board.slug, name=board.name, shard=BOARD_DEFAULT_SHARD)
+    db.add(db_board)
+    db.commit()
+    db.refresh(db_board)
+    return db_board
+
+@router.get("/{slug}/features", response_model=dict)
+def list_board_features(
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated feature fields to return"),
+    include: Optional[str] = Query(None, description="Related objects to embed, e.g. author"),
+    board: Board = Depends(get_board),
+    users_db: Session = Depends(get_db),
+    db: Session = Depends(get_board_db)
+):
+    selected_fields = parse_fields(fields)
+    include_author = parse_include(include, fields)
+    offset = (page - 1) * limit
+
+    total = db.query(func.count(Feature.id)).filter(Feature.board_id == board.id).scalar()
+    rows = board_feature_query(db, board, selected_fields, include_author).order_by(
+        Feature.id
+    ).offset(offset).limit(limit).all()
+
+    return {
+        "items": serialize_board_features(users_db, rows, selected_fields, include_author),
+        "total": total,
+        "page": page,
+        "limit": limit,
+        "pages": (total + limit - 1) // limit
+    }
+
+@router.post("/{slug}/features", response_model=dict)
+def create_board_feature(
+    feature: FeatureCreate,
+    board: Board = Depends(get_board),
+    current_user: User = Depends(get_current_user),
+    global_db: Session = Depends(get_write_db),
+    db: Session = Depends(get_board_write_db)
+):
+    ids_db = id_session(board, global_db, db)
+    feature_id = allocate_feature_id(ids_db, board.id)
+    if ids_db is not db:
+        # Committed before the shard insert; a failed insert only skips an id
+        ids_db.commit()
+    add_feature(db, feature_id, board.id, feature, current_user)
+    invalidate_cached_lists(board)
+
+    fields = list(FEATURE_FIELDS)
+    row = feature_query(db, fields, False, board.id).filter(Feature.id == feature_id).first()
+    item = serialize_feature(row, fields, False)
+    item["author"] = serialize_author(current_user)
+    return item
+
+@router.get("/{slug}/features/{feature_id}", response_model=dict)
+def get_board_feature(
+    feature_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated feature fields to return"),
+    include: Optional[str] = Query(None, description="Related objects to embed, e.g. author"),
+    board: Board = Depends(get_board),
+    users_db: Session = Depends(get_db),
+    db: Session = Depends(get_board_db)
+):
+    selected_fields = parse_fields(fields)
+    include_author = parse_include(include, fields)
+
+    row = board_feature_query(db, board, selected_fields, include_author).filter(
+        Feature.id == feature_id
+    ).first()
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature not found"
+        )
+
+    return serialize_board_features(users_db, [row], selected_fields, include_author)[0]
+
+@router.post("/{slug}/votes", response_model=VoteResponse)
+def create_board_vote(
+    vote: VoteCreate,
+    board: Board = Depends(get_board),
+    current_user: User = Depends(get_current_user),
+    global_db: Session = Depends(get_write_db),
+    db: Session = Depends(get_board_write_db)
+):
+    feature = db.query(Feature).filter(
+        Feature.id == vote.feature_id,
+        Feature.board_id == board.id
+    ).first()
+    if not feature:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature not found"
+        )
+
+    db_vote = cast_vote(db, feature, current_user, id_session(board, global_db, db))
+    invalidate_cached_lists(board)
+    return db_vote
+
+@router.delete("/{slug}/votes/{feature_id}")
+def remove_board_vote(
+    feature_id: int,
+    board: Board = Depends(get_board),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_board_write_db)
+):
+    feature = db.query(Feature.id).filter(
+        Feature.id == feature_id,
+        Feature.board_id == board.id
+    ).first()
+    if not feature:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature not found"
+        )
+
+    withdraw_vote(db, feature_id, current_user)
+    invalidate_cached_lists(board)
+    return {"message": "Vote removed successfully"}
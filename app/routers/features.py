@@ -1,118 +1,298 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
-from typing import List
-from app.database import get_db
+from sqlalchemy.orm import Session
+from sqlalchemy import desc, func, select
+from typing import List, Optional
+from datetime import datetime
+from app.database import get_db, get_write_db
 from app.models import Feature, User, Vote
-from app.schemas import FeatureCreate, FeatureResponse
+from app.schemas import FeatureBatchRequest, FeatureCreate, FeatureResponse
 from app.auth import get_current_user
+from app.negotiation import NegotiatedRoute
+from app.compression import response_cache
+from app.outbox import enqueue
+from app.sketches import approximate_count
+from app.sharding import DEFAULT_BOARD_ID, allocate_feature_id
+from app.rollups import MAX_STATS_BUCKETS, bucket_for, get_vote_buckets, parse_resolution, to_utc_naive
 
-router = APIRouter(prefix="/features", tags=["features"])
+router = APIRouter(prefix="/features", tags=["features"], route_class=NegotiatedRoute)
 
-@router.post("/", response_model=dict)
-def create_feature(
-    feature: FeatureCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+FEATURE_FIELDS = ("id", "title", "description", "author_id", "created_at", "vote_count")
+FEATURE_INCLUDES = ("author",)
+MAX_BATCH_IDS = 100
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    if fields is None:
+        return list(FEATURE_FIELDS)
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in FEATURE_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown field: {unknown[0]}"
+        )
+    # id is always returned so clients can key the results
+    return ["id"] + [name for name in FEATURE_FIELDS if name in requested and name != "id"]
+
+def parse_include(include: Optional[str], fields: Optional[str]) -> bool:
+    # Without fields/include the full shape, author included, is returned
+    if include is None:
+        return fields is None
+    requested = [name.strip() for name in include.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in FEATURE_INCLUDES]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include: {unknown[0]}"
+        )
+    return "author" in requested
+
+def feature_query(db: Session, fields: List[str], include_author: bool, board_id: int = DEFAULT_BOARD_ID):
+    """Select only the requested feature columns of one board.
+
+    The vote count is a correlated subquery rather than a load of every
+    vote row, and the users join only happens when the author is included.
+    Users are only on the default shard, so other boards must not include it.
+    """
+    columns = [getattr(Feature, name) for name in fields if name != "vote_count"]
+    if "vote_count" in fields:
+        columns.append(
+            select(func.count(Vote.id))
+            .where(Vote.feature_id == Feature.id)
+            .correlate(Feature)
+            .scalar_subquery()
+            .label("vote_count")
+        )
+    if include_author:
+        columns += [
+            User.id.label("author__id"),
+            User.name.label("author__name"),
+            User.email.label("author__email"),
+            User.created_at.label("author__created_at"),
+        ]
+    
+    query = db.query(*columns).select_from(Feature).filter(Feature.board_id == board_id)
+    if include_author:
+        query = query.join(User, Feature.author_id == User.id)
+    return query
+
+def serialize_feature(row, fields: List[str], include_author: bool) -> dict:
+    item = {name: getattr(row, name) for name in fields}
+    if include_author:
+        item["author"] = {
+            "id": row.author__id,
+            "name": row.author__name,
+            "email": row.author__email,
+            "created_at": row.author__created_at
+        }
+    return item
+
+def add_feature(db: Session, feature_id: int, board_id: int, feature: FeatureCreate, author: User) -> Feature:
     db_feature = Feature(
+        id=feature_id,
+        board_id=board_id,
         title=feature.title,
         description=feature.description,
-        author_id=current_user.id
+        author_id=author.id
     )
     db.add(db_feature)
+    db.flush()
+    enqueue(db, "feature.created", db_feature.id, {
+        "feature_id": db_feature.id,
+        "board_id": board_id,
+        "author_id": author.id
+    })
     db.commit()
-    db.refresh(db_feature)
-    
-    # Load the feature with all relationships for proper serialization
-    feature = db.query(Feature).options(
-        joinedload(Feature.author),
-        joinedload(Feature.votes)
-    ).filter(Feature.id == db_feature.id).first()
+    return db_feature
+
+@router.post("/", response_model=dict)
+def create_feature(
+    feature: FeatureCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_write_db)
+):
+    # The default board lives in the global database, so the id is
+    # allocated in the same transaction as the insert
+    feature_id = allocate_feature_id(db, DEFAULT_BOARD_ID)
+    db_feature = add_feature(db, feature_id, DEFAULT_BOARD_ID, feature, current_user)
+    response_cache.clear()
     
-    # Manually construct response to avoid serialization issues
-    return {
-        "id": feature.id,
-        "title": feature.title,
-        "description": feature.description,
-        "author_id": feature.author_id,
-        "created_at": feature.created_at,
-        "author": {
-            "id": feature.author.id,
-            "name": feature.author.name,
-            "email": feature.author.email,
-            "created_at": feature.author.created_at
-        },
-        "vote_count": feature.vote_count
-    }
+    fields = list(FEATURE_FIELDS)
+    row = feature_query(db, fields, True).filter(Feature.id == db_feature.id).first()
+    return serialize_feature(row, fields, True)
 
 @router.get("/", response_model=dict)
 def list_features(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated feature fields to return"),
+    include: Optional[str] = Query(None, description="Related objects to embed, e.g. author"),
+    approximate: bool = Query(False, description="Estimate the total instead of counting every row"),
     db: Session = Depends(get_db)
 ):
+    selected_fields = parse_fields(fields)
+    include_author = parse_include(include, fields)
     offset = (page - 1) * limit
     
     # Get total count
-    total = db.query(func.count(Feature.id)).scalar()
+    if approximate:
+        total = approximate_count(db, Feature, DEFAULT_BOARD_ID)
+    else:
+        total = db.query(func.count(Feature.id)).filter(Feature.board_id == DEFAULT_BOARD_ID).scalar()
     
-    # Get features with pagination and eager load relationships
-    features = db.query(Feature).options(
-        joinedload(Feature.author),
-        joinedload(Feature.votes)
+    rows = feature_query(db, selected_fields, include_author).order_by(
+        Feature.id
     ).offset(offset).limit(limit).all()
     
-    # Manually construct response to avoid serialization issues
-    feature_items = []
-    for feature in features:
-        feature_items.append({
-            "id": feature.id,
-            "title": feature.title,
-            "description": feature.description,
-            "author_id": feature.author_id,
-            "created_at": feature.created_at,
-            "author": {
-                "id": feature.author.id,
-                "name": feature.author.name,
-                "email": feature.author.email,
-                "created_at": feature.author.created_at
-            },
-            "vote_count": feature.vote_count
-        })
-    
-    return {
-        "items": feature_items,
+    response = {
+        "items": [serialize_feature(row, selected_fields, include_author) for row in rows],
         "total": total,
         "page": page,
         "limit": limit,
         "pages": (total + limit - 1) // limit
     }
+    if approximate:
+        response["total_is_estimate"] = True
+    return response
+
+@router.get("/top", response_model=dict)
+def list_top_features(
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    fields = list(FEATURE_FIELDS)
+    rows = feature_query(db, fields, True).order_by(
+        desc("vote_count"), Feature.id
+    ).limit(limit).all()
+    return {"items": [serialize_feature(row, fields, True) for row in rows]}
+
+def fetch_features_batch(
+    ids: List[int],
+    fields: Optional[str],
+    include: Optional[str],
+    db: Session
+) -> dict:
+    if not ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one id is required"
+        )
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_IDS} ids can be fetched at once"
+        )
+    selected_fields = parse_fields(fields)
+    include_author = parse_include(include, fields)
+    
+    # One IN query for all ids, then reassemble in request order
+    rows = feature_query(db, selected_fields, include_author).filter(
+        Feature.id.in_(set(ids))
+    ).all()
+    found = {row.id: serialize_feature(row, selected_fields, include_author) for row in rows}
+    
+    return {
+        "items": [
+            found.get(feature_id, {"id": feature_id, "error": "Feature not found"})
+            for feature_id in ids
+        ]
+    }
+
+@router.get("/batch", response_model=dict)
+def get_features_batch_by_query(
+    ids: str = Query(..., description="Comma-separated feature ids"),
+    fields: Optional[str] = Query(None, description="Comma-separated feature fields to return"),
+    include: Optional[str] = Query(None, description="Related objects to embed, e.g. author"),
+    db: Session = Depends(get_db)
+):
+    try:
+        feature_ids = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    return fetch_features_batch(feature_ids, fields, include, db)
+
+@router.post("/batch", response_model=dict)
+def get_features_batch_by_body(
+    batch: FeatureBatchRequest,
+    fields: Optional[str] = Query(None, description="Comma-separated feature fields to return"),
+    include: Optional[str] = Query(None, description="Related objects to embed, e.g. author"),
+    db: Session = Depends(get_db)
+):
+    return fetch_features_batch(batch.ids, fields, include, db)
 
 @router.get("/{feature_id}", response_model=dict)
-def get_feature(feature_id: int, db: Session = Depends(get_db)):
-    feature = db.query(Feature).options(
-        joinedload(Feature.author),
-        joinedload(Feature.votes)
-    ).filter(Feature.id == feature_id).first()
-    if not feature:
+def get_feature(
+    feature_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated feature fields to return"),
+    include: Optional[str] = Query(None, description="Related objects to embed, e.g. author"),
+    db: Session = Depends(get_db)
+):
+    selected_fields = parse_fields(fields)
+    include_author = parse_include(include, fields)
+    
+    row = feature_query(db, selected_fields, include_author).filter(
+        Feature.id == feature_id
+    ).first()
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature not found"
+        )
+    
+    return serialize_feature(row, selected_fields, include_author)
+
+@router.get("/{feature_id}/stats", response_model=dict)
+def get_feature_stats(
+    feature_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: str = Query("1h", description="Bucket size, e.g. 1h, 6h, 1d, 1w"),
+    db: Session = Depends(get_db)
+):
+    bucket_size = parse_resolution(resolution)
+    if bucket_size is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid resolution"
+        )
+    
+    try:
+        end = to_utc_naive(end) if end else bucket_for(datetime.utcnow()) + bucket_size
+        start = to_utc_naive(start) if start else end - 24 * bucket_size
+    except OverflowError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Requested range is out of bounds"
+        )
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    if (end - start) / bucket_size > MAX_STATS_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Requested range exceeds {MAX_STATS_BUCKETS} buckets"
+        )
+    
+    exists = db.query(Feature.id).filter(
+        Feature.id == feature_id,
+        Feature.board_id == DEFAULT_BOARD_ID
+    ).first()
+    if not exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Feature not found"
         )
     
-    # Manually construct response to avoid serialization issues
+    buckets = get_vote_buckets(db, feature_id, start, end, bucket_size)
     return {
-        "id": feature.id,
-        "title": feature.title,
-        "description": feature.description,
-        "author_id": feature.author_id,
-        "created_at": feature.created_at,
-        "author": {
-            "id": feature.author.id,
-            "name": feature.author.name,
-            "email": feature.author.email,
-            "created_at": feature.author.created_at
-        },
-        "vote_count": feature.vote_count
+        "feature_id": feature_id,
+        "resolution": resolution,
+        "start": buckets[0]["start"] if buckets else start,
+        "end": end,
+        "buckets": buckets,
+        "total": sum(bucket["count"] for bucket in buckets)
     }
\ No newline at end of file
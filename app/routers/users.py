@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.database import get_db
+from app.models import Board, Feature, User, Vote
+from app.auth import get_current_user
+from app.negotiation import NegotiatedRoute
+from app.sharding import DEFAULT_BOARD_SLUG, get_board, get_board_db
+from app.routers.features import parse_fields, parse_include
+from app.routers.boards import board_feature_query, serialize_board_features
+
+router = APIRouter(prefix="/users", tags=["users"], route_class=NegotiatedRoute)
+
+# Both listings page newest-first by id using the last id seen as the cursor,
+# so each page is an index range scan no matter how deep the client goes.
+# They cover one board at a time, the default board unless ?board= is given,
+# and read it from the board's shard.
+
+def get_listed_board(
+    board: str = Query(DEFAULT_BOARD_SLUG, description="Slug of the board to list"),
+    db: Session = Depends(get_db)
+) -> Board:
+    return get_board(board, db)
+
+def get_listed_board_db(board: Board = Depends(get_listed_board)):
+    yield from get_board_db(board)
+
+@router.get("/{user_id}/features", response_model=dict)
+def list_user_features(
+    user_id: int,
+    cursor: Optional[int] = Query(None, description="Return features with an id lower than this"),
+    limit: int = Query(10, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated feature fields to return"),
+    include: Optional[str] = Query(None, description="Related objects to embed, e.g. author"),
+    board: Board = Depends(get_listed_board),
+    users_db: Session = Depends(get_db),
+    db: Session = Depends(get_listed_board_db)
+):
+    selected_fields = parse_fields(fields)
+    include_author = parse_include(include, fields)
+
+    user = users_db.query(User.id).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    query = board_feature_query(db, board, selected_fields, include_author).filter(Feature.author_id == user_id)
+    if cursor is not None:
+        query = query.filter(Feature.id < cursor)
+    rows = query.order_by(Feature.id.desc()).limit(limit + 1).all()
+
+    items = serialize_board_features(users_db, rows[:limit], selected_fields, include_author)
+    return {
+        "items": items,
+        "next_cursor": items[-1]["id"] if len(rows) > limit else None
+    }
+
+@router.get("/me/votes", response_model=dict)
+def list_my_votes(
+    cursor: Optional[int] = Query(None, description="Return votes with an id lower than this"),
+    limit: int = Query(10, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    board: Board = Depends(get_listed_board),
+    db: Session = Depends(get_listed_board_db)
+):
+    query = db.query(Vote.id, Vote.user_id, Vote.feature_id, Vote.created_at).join(
+        Feature, Feature.id == Vote.feature_id
+    ).filter(
+        Vote.user_id == current_user.id,
+        Feature.board_id == board.id
+    )
+    if cursor is not None:
+        query = query.filter(Vote.id < cursor)
+    rows = query.order_by(Vote.id.desc()).limit(limit + 1).all()
+
+    items = [
+        {
+            "id": row.id,
+            "user_id": row.user_id,
+            "feature_id": row.feature_id,
+            "created_at": row.created_at
+        }
+        for row in rows[:limit]
+    ]
+    return {
+        "items": items,
+        "next_cursor": items[-1]["id"] if len(rows) > limit else None
+    }
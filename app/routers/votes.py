@@ -1,30 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_write_db
 from app.models import Vote, Feature, User
 from app.schemas import VoteCreate, VoteResponse
 from app.auth import get_current_user
+from app.negotiation import NegotiatedRoute
+from app.compression import response_cache
+from app.outbox import enqueue
+from app.rollups import record_vote
+from app.sketches import record_voter
+from app.sharding import DEFAULT_BOARD_ID, allocate_vote_id
 
-router = APIRouter(prefix="/votes", tags=["votes"])
+router = APIRouter(prefix="/votes", tags=["votes"], route_class=NegotiatedRoute)
 
-@router.post("/", response_model=VoteResponse)
-def create_vote(
-    vote: VoteCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    # Check if feature exists
-    feature = db.query(Feature).filter(Feature.id == vote.feature_id).first()
-    if not feature:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Feature not found"
-        )
-    
+def cast_vote(db: Session, feature: Feature, current_user: User, ids_db: Optional[Session] = None) -> Vote:
+    """Record a vote, allocating its id in ``ids_db`` (the global database).
+
+    Without ``ids_db`` the id is allocated in ``db``'s own transaction.
+    """
     # Check if user already voted for this feature
     existing_vote = db.query(Vote).filter(
         Vote.user_id == current_user.id,
-        Vote.feature_id == vote.feature_id
+        Vote.feature_id == feature.id
     ).first()
     
     if existing_vote:
@@ -40,21 +38,26 @@ def create_vote(
             detail="You cannot vote for your own feature"
         )
     
+    vote_id = allocate_vote_id(ids_db or db, feature.board_id)
+    if ids_db is not None and ids_db is not db:
+        # Committed before the shard insert; a failed insert only skips an id
+        ids_db.commit()
     db_vote = Vote(
+        id=vote_id,
         user_id=current_user.id,
-        feature_id=vote.feature_id
+        feature_id=feature.id
     )
     db.add(db_vote)
+    db.flush()
+    db.refresh(db_vote)
+    record_vote(db, db_vote.feature_id, db_vote.created_at, 1)
+    record_voter(db, db_vote.feature_id, current_user.id, db_vote.created_at)
+    enqueue(db, "vote.created", db_vote.feature_id, {"feature_id": db_vote.feature_id, "user_id": current_user.id})
     db.commit()
     db.refresh(db_vote)
     return db_vote
 
-@router.delete("/{feature_id}")
-def remove_vote(
-    feature_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def withdraw_vote(db: Session, feature_id: int, current_user: User):
     vote = db.query(Vote).filter(
         Vote.user_id == current_user.id,
         Vote.feature_id == feature_id
@@ -66,6 +69,48 @@ def remove_vote(
             detail="Vote not found"
         )
     
+    record_vote(db, vote.feature_id, vote.created_at, -1)
+    enqueue(db, "vote.deleted", vote.feature_id, {"feature_id": vote.feature_id, "user_id": current_user.id})
     db.delete(vote)
     db.commit()
-    return {"message": "Vote removed successfully"}
\ No newline at end of file
+
+@router.post("/", response_model=VoteResponse)
+def create_vote(
+    vote: VoteCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_write_db)
+):
+    # Check if feature exists
+    feature = db.query(Feature).filter(
+        Feature.id == vote.feature_id,
+        Feature.board_id == DEFAULT_BOARD_ID
+    ).first()
+    if not feature:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature not found"
+        )
+    
+    db_vote = cast_vote(db, feature, current_user)
+    response_cache.clear()
+    return db_vote
+
+@router.delete("/{feature_id}")
+def remove_vote(
+    feature_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_write_db)
+):
+    feature = db.query(Feature.id).filter(
+        Feature.id == feature_id,
+        Feature.board_id == DEFAULT_BOARD_ID
+    ).first()
+    if not feature:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature not found"
+        )
+
+    withdraw_vote(db, feature_id, current_user)
+    response_cache.clear()
+    return {"message": "Vote removed successfully"}
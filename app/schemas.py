@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 from typing import Optional, List
 
@@ -27,6 +27,19 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: Optional[str] = None
 
+class BoardCreate(BaseModel):
+    slug: str = Field(..., pattern=r"^[a-z0-9][a-z0-9-]*$", max_length=64)
+    name: str
+
+class BoardResponse(BaseModel):
+    id: int
+    slug: str
+    name: str
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
 class FeatureCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -43,6 +56,19 @@ class FeatureResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class FeatureSparseResponse(BaseModel):
+    # Shape returned when `fields=`/`include=` narrow a feature response
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    author_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    author: Optional[UserResponse] = None
+    vote_count: Optional[int] = None
+
+class FeatureBatchRequest(BaseModel):
+    ids: List[int]
+
 class VoteCreate(BaseModel):
     feature_id: int
 
@@ -0,0 +1,394 @@
+import logging
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import ForeignKeyConstraint, MetaData, and_, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.schema import CreateSchema
+from app.database import Base, create_db_engine, engine, get_db, is_sqlite, writer_engine
+from app.models import Board, BoardLock, FeatureId, VoteId
+from app.outbox import OUTBOX_RETENTION
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARD = "default"
+# Serves the unscoped /features and /votes endpoints; created by migration
+DEFAULT_BOARD_ID = 1
+DEFAULT_BOARD_SLUG = "default"
+
+# Extra shards as comma-separated name=url pairs, e.g.
+# "hot=postgresql://db2/metacto,eu=postgresql://db1/metacto#board_eu".
+# A #schema suffix puts the shard in its own schema of that database.
+SHARD_URLS = os.getenv("SHARD_URLS", "")
+# Shard that new boards are created on
+BOARD_DEFAULT_SHARD = os.getenv("BOARD_DEFAULT_SHARD", DEFAULT_SHARD)
+
+REBALANCE_BATCH_SIZE = int(os.getenv("REBALANCE_BATCH_SIZE", "500"))
+REBALANCE_THROTTLE = float(os.getenv("REBALANCE_THROTTLE", "0"))
+BOARD_MOVING_RETRY_AFTER = 5
+
+# Tables holding a board's data, created on every shard
+SHARD_TABLES = ("features", "votes", "vote_rollups", "voter_sketches", "outbox_events", "board_locks")
+
+class Shard:
+    def __init__(self, name: str, engine, writer_engine=None, schema: Optional[str] = None):
+        self.name = name
+        self.schema = schema
+        self.engine = engine
+        self.writer_engine = writer_engine or engine
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.WriteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.writer_engine)
+
+def shard_from_url(name: str, url: str) -> Shard:
+    url, _, schema = url.partition("#")
+    shard_engine = create_db_engine(url)
+    shard_writer = create_db_engine(url, writer=True) if is_sqlite(url) else shard_engine
+    if schema:
+        shard_engine = shard_engine.execution_options(schema_translate_map={None: schema})
+        shard_writer = shard_writer.execution_options(schema_translate_map={None: schema})
+    return Shard(name, shard_engine, shard_writer, schema or None)
+
+def parse_shard_urls(value: str) -> Dict[str, str]:
+    urls = {}
+    for part in value.split(","):
+        name, _, url = part.strip().partition("=")
+        if name and url:
+            urls[name.strip()] = url.strip()
+    return urls
+
+# The default shard is the main database, managed by alembic
+shards: Dict[str, Shard] = {DEFAULT_SHARD: Shard(DEFAULT_SHARD, engine, writer_engine)}
+for _name, _url in parse_shard_urls(SHARD_URLS).items():
+    shards[_name] = shard_from_url(_name, _url)
+
+def get_shard(name: str) -> Shard:
+    shard = shards.get(name)
+    if shard is None:
+        raise LookupError(f"Unknown shard: {name}")
+    return shard
+
+def build_shard_metadata() -> MetaData:
+    """Copy the board tables without their foreign keys to users.
+
+    Users stay in the global database, which a shard can't reference.
+    """
+    metadata = MetaData()
+    for name in SHARD_TABLES:
+        table = Base.metadata.tables[name].to_metadata(metadata)
+        for constraint in [c for c in table.constraints if isinstance(c, ForeignKeyConstraint)]:
+            if constraint.elements[0].target_fullname.split(".")[0] in SHARD_TABLES:
+                continue
+            table.constraints.remove(constraint)
+            for element in constraint.elements:
+                element.parent.foreign_keys.discard(element)
+                table.foreign_keys.discard(element)
+    return metadata
+
+shard_metadata = build_shard_metadata()
+
+def create_shard_schema(shard: Shard) -> None:
+    with shard.writer_engine.begin() as conn:
+        if shard.schema:
+            conn.execute(CreateSchema(shard.schema, if_not_exists=True))
+        shard_metadata.create_all(conn)
+
+def allocate_feature_id(db: Session, board_id: int) -> int:
+    """Reserve a feature id, unique across every shard, in the global database."""
+    entry = FeatureId(board_id=board_id)
+    db.add(entry)
+    db.flush()
+    return entry.id
+
+def allocate_vote_id(db: Session, board_id: int) -> int:
+    """Reserve a vote id, unique across every shard, in the global database."""
+    entry = VoteId(board_id=board_id)
+    db.add(entry)
+    db.flush()
+    return entry.id
+
+def get_board(slug: str, db: Session = Depends(get_db)) -> Board:
+    board = db.query(Board).filter(Board.slug == slug).first()
+    if not board:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Board not found"
+        )
+    return board
+
+def get_board_db(board: Board = Depends(get_board)):
+    db = get_shard(board.shard).SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def board_moving() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Board is moving to another shard, try again shortly",
+        headers={"Retry-After": str(BOARD_MOVING_RETRY_AFTER)}
+    )
+
+def upsert_board_lock(conn, board_id: int, frozen: Optional[bool] = None) -> None:
+    """Create the board's lock row if missing, and set ``frozen`` if given.
+
+    Setting ``frozen`` updates the row, so it waits for every write holding
+    the row's share lock to finish.
+    """
+    dialect = conn.get_bind().dialect.name if isinstance(conn, Session) else conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(BoardLock).values(
+            board_id=board_id, frozen=bool(frozen)
+        )
+        if frozen is None:
+            insert = insert.on_conflict_do_nothing(index_elements=[BoardLock.board_id])
+        else:
+            insert = insert.on_conflict_do_update(index_elements=[BoardLock.board_id], set_={"frozen": frozen})
+        conn.execute(insert)
+        return
+
+    table = BoardLock.__table__
+    if conn.execute(select(table.c.board_id).where(table.c.board_id == board_id)).first() is None:
+        conn.execute(table.insert().values(board_id=board_id, frozen=bool(frozen)))
+    elif frozen is not None:
+        conn.execute(table.update().where(table.c.board_id == board_id).values(frozen=frozen))
+
+def freeze_board(shard: Shard, board_id: int, frozen: bool) -> None:
+    with shard.writer_engine.begin() as conn:
+        upsert_board_lock(conn, board_id, frozen)
+
+def get_board_write_db(board: Board = Depends(get_board)):
+    """Session for writes to the board's shard, refused while it moves.
+
+    ``moving_to`` turns most writes away early, but it is read before the
+    write starts. The authoritative check is the board's lock row on the
+    shard, share-locked for the rest of the transaction: a move freezes it
+    only once every write holding it has committed, and writes that start
+    later see it frozen.
+    """
+    if board.moving_to is not None:
+        raise board_moving()
+    db = get_shard(board.shard).WriteSessionLocal()
+    try:
+        upsert_board_lock(db, board.id)
+        frozen = db.query(BoardLock.frozen).filter(
+            BoardLock.board_id == board.id
+        ).with_for_update(read=True).scalar()
+        if frozen:
+            raise board_moving()
+        yield db
+    finally:
+        db.close()
+
+# Rebalancing
+
+# Key columns of each table as synced between shards. Feature and vote ids
+# are allocated globally, so rows keep their ids on the target shard.
+SYNC_TABLES = (
+    ("features", ("id",), ()),
+    ("votes", ("id",), ()),
+    ("vote_rollups", ("feature_id", "bucket_start"), ()),
+    ("voter_sketches", ("feature_id", "bucket_start"), ()),
+)
+
+def sync_rows(source, target, table, keys: Sequence[str], where, skip: Iterable[str] = ()) -> int:
+    """Make ``target``'s rows matching ``where`` equal ``source``'s. Returns rows written."""
+    columns = [column for column in table.c if column.name not in skip]
+
+    def load(conn):
+        rows = conn.execute(select(*columns).where(where)).mappings()
+        return {tuple(row[key] for key in keys): dict(row) for row in rows}
+
+    def match(key):
+        return and_(*[table.c[name] == value for name, value in zip(keys, key)])
+
+    source_rows, target_rows = load(source), load(target)
+    written = 0
+    for key in target_rows.keys() - source_rows.keys():
+        target.execute(table.delete().where(match(key)))
+        written += 1
+    for key, row in source_rows.items():
+        if key not in target_rows:
+            target.execute(table.insert().values(**row))
+            written += 1
+        elif target_rows[key] != row:
+            target.execute(table.update().where(match(key)).values(**row))
+            written += 1
+    return written
+
+def board_feature_batches(shard: Shard, board_id: int, batch_size: int):
+    features = shard_metadata.tables["features"]
+    last_id = 0
+    while True:
+        with shard.engine.connect() as conn:
+            ids = conn.execute(
+                select(features.c.id)
+                .where(features.c.board_id == board_id, features.c.id > last_id)
+                .order_by(features.c.id)
+                .limit(batch_size)
+            ).scalars().all()
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+def sync_features(ids: Sequence[int], source: Shard, target: Shard) -> int:
+    """Copy the rows of the given features to ``target``. Returns rows written."""
+    written = 0
+    with source.engine.connect() as src, target.writer_engine.begin() as dst:
+        for name, keys, skip in SYNC_TABLES:
+            table = shard_metadata.tables[name]
+            column = table.c.id if name == "features" else table.c.feature_id
+            written += sync_rows(src, dst, table, keys, column.in_(ids), skip)
+    return written
+
+def sync_board(board_id: int, source: Shard, target: Shard, batch_size: int, throttle: float = 0.0) -> int:
+    """Copy a board's rows to ``target`` in batches of features. Returns rows written."""
+    written = 0
+    for ids in board_feature_batches(source, board_id, batch_size):
+        written += sync_features(ids, source, target)
+        if throttle:
+            time.sleep(throttle)
+    return written
+
+def board_change_mark(shard: Shard, board_id: int) -> int:
+    """The newest outbox event id on ``shard`` once the board's writes are settled.
+
+    Every write to a board's rows enqueues an outbox event keyed by the
+    feature in its transaction. Holding the board's lock row exclusively
+    waits for the writes in progress, and later ones can only enqueue
+    after it is released, so all of the board's changes from then on have
+    an event id above the mark.
+    """
+    locks = shard_metadata.tables["board_locks"]
+    events = shard_metadata.tables["outbox_events"]
+    with shard.writer_engine.begin() as conn:
+        upsert_board_lock(conn, board_id)
+        conn.execute(locks.update().where(locks.c.board_id == board_id).values(frozen=locks.c.frozen))
+        return conn.execute(select(func.coalesce(func.max(events.c.id), 0))).scalar()
+
+def sync_board_changes(board_id: int, source: Shard, target: Shard, since: int, batch_size: int) -> int:
+    """Copy the board's features changed after the outbox mark ``since``. Returns rows written."""
+    features = shard_metadata.tables["features"]
+    events = shard_metadata.tables["outbox_events"]
+    with source.engine.connect() as conn:
+        ids = conn.execute(
+            select(features.c.id)
+            .join(events, events.c.aggregate_id == features.c.id)
+            .where(events.c.id > since, features.c.board_id == board_id)
+            .distinct()
+            .order_by(features.c.id)
+        ).scalars().all()
+    written = 0
+    for start in range(0, len(ids), batch_size):
+        written += sync_features(ids[start:start + batch_size], source, target)
+    return written
+
+def purge_board(board_id: int, shard: Shard, batch_size: int, throttle: float = 0.0) -> int:
+    """Delete a board's rows from ``shard`` in batches. Returns features deleted."""
+    deleted = 0
+    for ids in board_feature_batches(shard, board_id, batch_size):
+        with shard.writer_engine.begin() as conn:
+            for name, _, _ in reversed(SYNC_TABLES):
+                table = shard_metadata.tables[name]
+                column = table.c.id if name == "features" else table.c.feature_id
+                conn.execute(table.delete().where(column.in_(ids)))
+        deleted += len(ids)
+        if throttle:
+            time.sleep(throttle)
+    return deleted
+
+def update_board(session_factory, board_id: int, **values) -> None:
+    db = session_factory()
+    try:
+        db.query(Board).filter(Board.id == board_id).update(values)
+        db.commit()
+    finally:
+        db.close()
+
+def move_board(
+    session_factory,
+    slug: str,
+    target_name: str,
+    batch_size: int = REBALANCE_BATCH_SIZE,
+    throttle: float = REBALANCE_THROTTLE,
+) -> int:
+    """Move a board's features and votes to another shard while it stays online.
+
+    The rows are copied in throttled batches while the board keeps serving
+    from its current shard. The board is then frozen on that shard, which
+    waits for in-flight writes to commit and refuses later ones with a 503
+    and Retry-After, for a final pass that copies only the features changed
+    since the copy began, found through the outbox. The board is switched to
+    the target shard, and the old copy is deleted in batches. Reads are never
+    interrupted. Returns the number of features moved.
+    """
+    db = session_factory()
+    try:
+        board = db.query(Board).filter(Board.slug == slug).first()
+        if board is None:
+            raise ValueError(f"Unknown board: {slug}")
+        board_id, source = board.id, get_shard(board.shard)
+    finally:
+        db.close()
+    target = get_shard(target_name)
+    if board_id == DEFAULT_BOARD_ID:
+        raise ValueError("The default board serves /features and /votes and stays on the default shard")
+    if source is target:
+        raise ValueError(f"Board {slug} is already on shard {target_name}")
+
+    create_shard_schema(target)
+    mark, marked_at = board_change_mark(source, board_id), time.monotonic()
+    written = sync_board(board_id, source, target, batch_size, throttle)
+    logger.info("Copied %s rows of board %s to shard %s", written, slug, target.name)
+
+    update_board(session_factory, board_id, moving_to=target.name)
+    try:
+        freeze_board(source, board_id, True)
+        if time.monotonic() - marked_at < OUTBOX_RETENTION.total_seconds():
+            written = sync_board_changes(board_id, source, target, mark, batch_size)
+        else:
+            # Events after the mark may have been purged; compare every row
+            written = sync_board(board_id, source, target, batch_size)
+        logger.info("Caught up %s rows of board %s on shard %s", written, slug, target.name)
+        # The target may still be frozen from an earlier move away from it
+        freeze_board(target, board_id, False)
+        update_board(session_factory, board_id, shard=target.name, moving_to=None)
+    except BaseException:
+        freeze_board(source, board_id, False)
+        update_board(session_factory, board_id, moving_to=None)
+        raise
+
+    moved = purge_board(board_id, source, batch_size, throttle)
+    logger.info("Moved %s features of board %s from shard %s to %s", moved, slug, source.name, target.name)
+    return moved
+
+def usage() -> None:
+    print("usage: python -m app.sharding list")
+    print("       python -m app.sharding init <shard>")
+    print("       python -m app.sharding move <board-slug> <shard>")
+    sys.exit(2)
+
+if __name__ == "__main__":
+    from app.database import SessionLocal, WriteSessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    args: List[str] = sys.argv[1:]
+    if args == ["list"]:
+        db = SessionLocal()
+        try:
+            for board in db.query(Board).order_by(Board.id):
+                print(f"{board.slug}\t{board.shard}\t{board.name}")
+        finally:
+            db.close()
+    elif len(args) == 2 and args[0] == "init":
+        create_shard_schema(get_shard(args[1]))
+        print(f"Created board tables on shard {args[1]}")
+    elif len(args) == 3 and args[0] == "move":
+        moved = move_board(WriteSessionLocal, args[1], args[2])
+        print(f"Moved {moved} features of board {args[1]} to shard {args[2]}")
+    else:
+        usage()
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import math
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models import VoterSketch
+
+# 2^12 one-byte registers: 4 KiB per sketch, ~1.6% standard error
+HLL_PRECISION = 12
+HLL_REGISTERS = 1 << HLL_PRECISION
+HLL_RELATIVE_ERROR = 1.04 / math.sqrt(HLL_REGISTERS)
+EMPTY_REGISTERS = bytes(HLL_REGISTERS)
+
+# Voters across all features are also kept in GLOBAL_STRIPES daily rows with
+# feature ids -1..-N, each voter always in the same one, so votes contend on
+# N rows instead of one and a total reads N rows per day
+GLOBAL_STRIPES = int(os.getenv("VOTER_SKETCH_STRIPES", "16"))
+
+class HyperLogLog:
+    """HyperLogLog cardinality sketch over 64-bit hashes.
+
+    Sketches with the same precision merge by taking the register-wise
+    maximum, which is how daily sketches combine into longer ranges.
+    """
+
+    def __init__(self, registers: Optional[bytes] = None):
+        self.registers = bytearray(registers) if registers else bytearray(HLL_REGISTERS)
+
+    def add(self, value) -> None:
+        digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        index = hashed >> (64 - HLL_PRECISION)
+        remaining = hashed & ((1 << (64 - HLL_PRECISION)) - 1)
+        rank = (64 - HLL_PRECISION) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / HLL_REGISTERS)
+        raw = alpha * HLL_REGISTERS ** 2 / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * HLL_REGISTERS and zeros:
+            # Small-range correction: linear counting is exact-ish here
+            raw = HLL_REGISTERS * math.log(HLL_REGISTERS / zeros)
+        return round(raw)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+def day_bucket(value: datetime) -> datetime:
+    return datetime(value.year, value.month, value.day)
+
+def global_stripe(user_id: int) -> int:
+    digest = hashlib.blake2b(str(user_id).encode(), digest_size=8, person=b"stripe").digest()
+    return -1 - int.from_bytes(digest, "big") % GLOBAL_STRIPES
+
+def record_voter(db: Session, feature_id: int, user_id: int, created_at: datetime) -> None:
+    """Add a voter to the feature's and a global stripe's sketch for the vote's day.
+
+    Runs in the vote's transaction. Each day's row is created with an
+    insert that ignores conflicts, then locked for update, so concurrent
+    votes neither fail on the primary key nor overwrite each other's
+    registers. Removing a vote leaves the sketches unchanged: they count
+    everyone who voted during the period.
+    """
+    bucket_start = day_bucket(created_at)
+    # Always feature row first, so two votes never wait on each other in a cycle
+    for scope in (feature_id, global_stripe(user_id)):
+        add_to_sketch(db, scope, bucket_start, user_id)
+
+def add_to_sketch(db: Session, feature_id: int, bucket_start: datetime, user_id: int) -> None:
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        db.execute(
+            insert(VoterSketch)
+            .values(feature_id=feature_id, bucket_start=bucket_start, registers=EMPTY_REGISTERS)
+            .on_conflict_do_nothing(index_elements=[VoterSketch.feature_id, VoterSketch.bucket_start])
+        )
+
+    row = db.query(VoterSketch).filter(
+        VoterSketch.feature_id == feature_id,
+        VoterSketch.bucket_start == bucket_start,
+    ).with_for_update().first()
+    if row is None:
+        row = VoterSketch(feature_id=feature_id, bucket_start=bucket_start, registers=EMPTY_REGISTERS)
+        db.add(row)
+    sketch = HyperLogLog(row.registers)
+    sketch.add(user_id)
+    row.registers = sketch.to_bytes()
+
+def voter_sketch(db: Session, feature_id: Optional[int], start: date, end: date) -> HyperLogLog:
+    """Merge the daily sketches for the days ``[start, end]``.
+
+    Without a feature id the global stripes are merged, which is the union
+    of all voters whatever the number of features.
+    """
+    query = db.query(VoterSketch.registers).filter(
+        VoterSketch.bucket_start >= datetime(start.year, start.month, start.day),
+        VoterSketch.bucket_start < datetime(end.year, end.month, end.day) + timedelta(days=1),
+    )
+    if feature_id is None:
+        query = query.filter(VoterSketch.feature_id < 0)
+    else:
+        query = query.filter(VoterSketch.feature_id == feature_id)
+    merged = HyperLogLog()
+    for (registers,) in query:
+        merged.merge(HyperLogLog(registers))
+    return merged
+
+def unique_voters(db: Session, feature_id: Optional[int], start: date, end: date) -> int:
+    """Estimate distinct voters over the days ``[start, end]``."""
+    return voter_sketch(db, feature_id, start, end).estimate()
+
+# Fallback for approximate totals where the planner has no estimate
+APPROXIMATE_COUNT_TTL = 30.0
+_count_cache = {}
+
+def planned_rows(db: Session, statement) -> int:
+    """The PostgreSQL planner's row estimate for ``statement``."""
+    # Only integer ids are bound, so they can be inlined into the EXPLAIN
+    sql = statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+def approximate_count(db: Session, model, board_id: Optional[int] = None) -> int:
+    """Cheap row count for pagination totals, optionally of one board's rows.
+
+    Uses the planner's row estimate for the filtered query on PostgreSQL,
+    otherwise an exact count cached for ``APPROXIMATE_COUNT_TTL`` seconds.
+    """
+    criteria = [model.board_id == board_id] if board_id is not None else []
+    if db.get_bind().dialect.name == "postgresql":
+        return planned_rows(db, select(literal_column("1")).select_from(model).where(*criteria))
+
+    key = (model.__tablename__, board_id)
+    cached = _count_cache.get(key)
+    if cached and time.monotonic() - cached[1] < APPROXIMATE_COUNT_TTL:
+        return cached[0]
+    count = db.query(func.count()).select_from(model).filter(*criteria).scalar()
+    _count_cache[key] = (count, time.monotonic())
+    return count
+
+def reset_count_cache() -> None:
+    _count_cache.clear()
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+from starlette.datastructures import Headers
+from app import negotiation
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "true").lower() == "true"
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "./snapshots")
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", "5"))
+# Anonymous reads are served from a snapshot younger than this
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", "10"))
+SNAPSHOT_PAGES = int(os.getenv("SNAPSHOT_PAGES", "5"))
+SNAPSHOT_PAGE_SIZE = 10
+SNAPSHOT_TOP_LIMIT = 10
+HEALTH_CHECK_TIMEOUT = float(os.getenv("SNAPSHOT_HEALTH_CHECK_TIMEOUT", "2"))
+CONTENT_TYPES = {"json": b"application/json", "msgpack": b"application/msgpack"}
+
+class SnapshotStore:
+    """Immutable snapshot files, replaced atomically and read via mmap.
+
+    Each snapshot is rendered as JSON and, when msgpack is installed, as
+    MessagePack, so clients get the format they negotiated even in
+    degraded mode.
+
+    Readers map each file once and keep the mapping until a newer file
+    replaces it, so serving a snapshot costs a stat and a copy out of the
+    page cache, shared by every worker on the host.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.db_healthy = True
+        self._maps: Dict[str, Tuple[int, mmap.mmap]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, name: str, media: str = "json") -> str:
+        return os.path.join(self.directory, f"{name}.{media}")
+
+    def publish(self, name: str, payload) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        if negotiation.msgpack is not None:
+            self._write(name, "msgpack", negotiation.packb(payload))
+        self._write(name, "json", json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode())
+
+    def _write(self, name: str, media: str, body: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path(name, media))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def read(self, name: str, media: str = "json") -> Optional[Tuple[bytes, float]]:
+        """Return the snapshot body and its age in seconds, if one exists."""
+        path = self.path(name, media)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            cached = self._maps.get(path)
+            if cached is None or cached[0] != stat.st_ino:
+                if cached is not None:
+                    cached[1].close()
+                with open(path, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[path] = cached = (stat.st_ino, mapped)
+            body = cached[1][:]
+        return body, time.time() - stat.st_mtime
+
+snapshot_store = SnapshotStore(SNAPSHOT_DIR)
+
+def snapshot_name(scope) -> Optional[str]:
+    """Map a request to the snapshot that holds its exact response."""
+    if scope["method"] != "GET":
+        return None
+    params = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    if scope["path"] == "/features/":
+        if set(params) - {"page", "limit"}:
+            return None
+        try:
+            page = int(params.get("page", ["1"])[0])
+            limit = int(params.get("limit", [str(SNAPSHOT_PAGE_SIZE)])[0])
+        except ValueError:
+            return None
+        if limit == SNAPSHOT_PAGE_SIZE and 1 <= page <= SNAPSHOT_PAGES:
+            return f"features-page-{page}"
+    elif scope["path"] == "/features/top" and not params:
+        return "features-top"
+    return None
+
+def render_snapshots(db, store: SnapshotStore = snapshot_store) -> None:
+    from app.routers.features import list_features, list_top_features
+
+    for page in range(1, SNAPSHOT_PAGES + 1):
+        store.publish(
+            f"features-page-{page}",
+            list_features(
+                page=page, limit=SNAPSHOT_PAGE_SIZE, fields=None, include=None, approximate=False, db=db
+            ),
+        )
+    store.publish("features-top", list_top_features(limit=SNAPSHOT_TOP_LIMIT, db=db))
+
+def check_db(session_factory) -> None:
+    db = session_factory()
+    try:
+        db.execute(text("SELECT 1"))
+    finally:
+        db.close()
+
+def publish_once(session_factory, store: SnapshotStore = snapshot_store) -> None:
+    db = session_factory()
+    try:
+        render_snapshots(db, store)
+    finally:
+        db.close()
+
+async def run_publisher(session_factory, store: SnapshotStore = snapshot_store):
+    """Health-check the database and re-render snapshots every interval."""
+    while True:
+        try:
+            await asyncio.wait_for(asyncio.to_thread(check_db, session_factory), HEALTH_CHECK_TIMEOUT)
+            store.db_healthy = True
+        except Exception:
+            if store.db_healthy:
+                logger.warning("Database health check failed; serving feature reads from snapshots")
+            store.db_healthy = False
+
+        if store.db_healthy:
+            try:
+                await asyncio.to_thread(publish_once, session_factory, store)
+            except Exception:
+                logger.exception("Failed to publish feature snapshots")
+
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+
+class SnapshotMiddleware:
+    """Serve feature list pages from snapshots.
+
+    Anonymous requests get a fresh-enough snapshot without touching the
+    database. When the database is failing health checks, or a request
+    raises before responding, any snapshot is served instead, giving a
+    read-only degraded mode rather than a 500.
+    """
+
+    def __init__(self, app, store: SnapshotStore = snapshot_store):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        name = snapshot_name(scope) if scope["type"] == "http" and SNAPSHOT_ENABLED else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        media = "msgpack" if negotiation.accepts_msgpack(headers.get("accept", "")) else "json"
+        if not self.store.db_healthy:
+            if await self.serve(name, media, send, stale_ok=True):
+                return
+        elif "authorization" not in headers:
+            if await self.serve(name, media, send, stale_ok=False):
+                return
+
+        response_started = False
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, tracking_send)
+        except Exception:
+            if response_started or not await self.serve(name, media, send, stale_ok=True):
+                raise
+            logger.exception("Serving %s snapshot after request failure", name)
+
+    async def serve(self, name: str, media: str, send, stale_ok: bool) -> bool:
+        snapshot = self.store.read(name, media)
+        if snapshot is None:
+            return False
+        body, age = snapshot
+        if not stale_ok and age > SNAPSHOT_MAX_AGE:
+            return False
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", CONTENT_TYPES[media]),
+                (b"content-length", str(len(body)).encode()),
+                (b"vary", b"Accept"),
+                (b"x-snapshot-age", f"{age:.1f}".encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+        return True
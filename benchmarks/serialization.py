@@ -0,0 +1,72 @@
+"""Compare JSON and MessagePack for a 100-item ``GET /features/`` page.
+
+    python -m benchmarks.serialization
+"""
+import gzip
+import json
+import timeit
+from datetime import datetime, timedelta
+
+import msgpack
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.negotiation import packb
+
+ITEMS = 100
+ROUNDS = 2000
+
+def feature_page(items: int = ITEMS) -> dict:
+    created = datetime(2025, 8, 14, 15, 2, 46)
+    return {
+        "items": [
+            {
+                "id": i,
+                "title": f"Feature request number {i}",
+                "description": "Allow users to export their boards as CSV so they can share them. " * 3,
+                "author_id": i % 17 + 1,
+                "created_at": created + timedelta(minutes=i),
+                "author": {
+                    "id": i % 17 + 1,
+                    "name": f"User {i % 17 + 1}",
+                    "email": f"user{i % 17 + 1}@example.com",
+                    "created_at": created,
+                },
+                "vote_count": i * 3,
+            }
+            for i in range(1, items + 1)
+        ],
+        "total": 1000,
+        "page": 1,
+        "limit": items,
+        "pages": 1000 // items,
+    }
+
+def encode_json(page: dict) -> bytes:
+    # What FastAPI does for a dict response: jsonable_encoder, then json.dumps
+    return JSONResponse(jsonable_encoder(page)).body
+
+def main():
+    page = feature_page()
+    json_body = encode_json(page)
+    msgpack_body = packb(page)
+
+    results = [
+        ("json", json_body,
+         timeit.timeit(lambda: encode_json(page), number=ROUNDS),
+         timeit.timeit(lambda: json.loads(json_body), number=ROUNDS)),
+        ("msgpack", msgpack_body,
+         timeit.timeit(lambda: packb(page), number=ROUNDS),
+         timeit.timeit(lambda: msgpack.unpackb(msgpack_body, timestamp=3), number=ROUNDS)),
+    ]
+
+    print(f"{ITEMS}-item feature page, {ROUNDS} rounds")
+    print(f"{'format':<8} {'bytes':>8} {'gzipped':>8} {'encode us':>10} {'decode us':>10}")
+    for name, body, encode_time, decode_time in results:
+        print(
+            f"{name:<8} {len(body):>8} {len(gzip.compress(body)):>8} "
+            f"{encode_time / ROUNDS * 1e6:>10.1f} {decode_time / ROUNDS * 1e6:>10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,27 @@
+import os
+
+# Background workers would talk to the real database; tests drive them directly
+os.environ["SNAPSHOT_ENABLED"] = "false"
+os.environ["OUTBOX_DISPATCHER_ENABLED"] = "false"
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.database import get_db, Base
+from app.compression import response_cache
+from app.idempotency import idempotency_store
+from app.ratelimit import rate_limit_backend
+from app.sketches import reset_count_cache
+from app.sharding import DEFAULT_BOARD_ID, DEFAULT_SHARD, Shard, create_shard_schema, shard_from_url, shard_metadata, shards
+from app.models import Board
+from app.database import get_db, get_write_db, create_db_engine, Base
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
+writer_engine = create_db_engine(SQLALCHEMY_DATABASE_URL, writer=True)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingWriteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
 
 def override_get_db():
     try:
@@ -19,11 +30,33 @@ def override_get_db():
     finally:
         db.close()
 
+def override_get_write_db():
+    try:
+        db = TestingWriteSessionLocal()
+        yield db
+    finally:
+        db.close()
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_write_db] = override_get_write_db
+
+# The default shard is the test database; boards can be moved to a second one
+shards[DEFAULT_SHARD] = Shard(DEFAULT_SHARD, engine, writer_engine)
+shards["secondary"] = shard_from_url("secondary", "sqlite:///./test_shard.db")
 
 @pytest.fixture
 def client():
     Base.metadata.create_all(bind=engine)
+    create_shard_schema(shards["secondary"])
+    db = TestingSessionLocal()
+    db.add(Board(id=DEFAULT_BOARD_ID, slug="default", name="Default", shard=DEFAULT_SHARD))
+    db.commit()
+    db.close()
+    response_cache.clear()
+    rate_limit_backend.reset()
+    idempotency_store.clear()
+    reset_count_cache()
     with TestClient(app) as c:
         yield c
-    Base.metadata.drop_all(bind=engine)
\ No newline at end of file
+    Base.metadata.drop_all(bind=engine)
+    shard_metadata.drop_all(bind=shards["secondary"].engine)
\ No newline at end of file
@@ -0,0 +1,334 @@
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.models import Board, Feature, FeatureId, Vote
+from app import sharding
+from app.routers import boards
+from app.sharding import board_change_mark, get_board_write_db, move_board, shards, sync_board, sync_board_changes
+from tests.conftest import TestingSessionLocal, TestingWriteSessionLocal, writer_engine
+from tests.test_votes import get_auth_headers, create_feature
+
+def create_board(client: TestClient, headers: dict, slug: str = "mobile") -> dict:
+    response = client.post("/boards/", json={"slug": slug, "name": slug.title()}, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+def create_board_feature(client: TestClient, slug: str, headers: dict, title: str = "Board Feature") -> int:
+    response = client.post(
+        f"/boards/{slug}/features",
+        json={"title": title, "description": "On a board"},
+        headers=headers
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def move(slug: str, shard: str):
+    return move_board(TestingWriteSessionLocal, slug, shard, batch_size=2)
+
+def test_create_and_list_boards(client: TestClient):
+    headers = get_auth_headers(client)
+    board = create_board(client, headers)
+    assert board["slug"] == "mobile"
+
+    slugs = [item["slug"] for item in client.get("/boards/").json()]
+    assert slugs == ["default", "mobile"]
+
+def test_create_board_rejects_duplicate_and_bad_slug(client: TestClient):
+    headers = get_auth_headers(client)
+    create_board(client, headers)
+    assert client.post("/boards/", json={"slug": "mobile", "name": "Again"}, headers=headers).status_code == 400
+    assert client.post("/boards/", json={"slug": "Not A Slug", "name": "Bad"}, headers=headers).status_code == 422
+
+def test_unknown_board(client: TestClient):
+    assert client.get("/boards/missing/features").status_code == 404
+
+def test_board_features_are_scoped(client: TestClient):
+    headers = get_auth_headers(client)
+    create_board(client, headers)
+    legacy_id = create_feature(client, headers, "Default Feature")
+    board_id = create_board_feature(client, "mobile", headers)
+    assert board_id != legacy_id
+
+    data = client.get("/boards/mobile/features").json()
+    assert data["total"] == 1
+    assert data["items"][0]["id"] == board_id
+    assert data["items"][0]["author"]["email"] == "test@example.com"
+
+    legacy = client.get("/features/").json()
+    assert [item["id"] for item in legacy["items"]] == [legacy_id]
+    assert client.get(f"/features/{board_id}").status_code == 404
+    assert client.get(f"/boards/mobile/features/{legacy_id}").status_code == 404
+
+def test_board_feature_sparse_fields(client: TestClient):
+    headers = get_auth_headers(client)
+    create_board(client, headers)
+    feature_id = create_board_feature(client, "mobile", headers)
+
+    item = client.get(f"/boards/mobile/features/{feature_id}?fields=title&include=author").json()
+    assert set(item) == {"id", "title", "author"}
+    assert item["author"]["email"] == "test@example.com"
+
+def test_board_votes(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    voter_headers = get_auth_headers(client, "voter@example.com")
+    create_board(client, author_headers)
+    feature_id = create_board_feature(client, "mobile", author_headers)
+    legacy_id = create_feature(client, author_headers)
+
+    response = client.post("/boards/mobile/votes", json={"feature_id": feature_id}, headers=voter_headers)
+    assert response.status_code == 200
+    assert client.get(f"/boards/mobile/features/{feature_id}").json()["vote_count"] == 1
+
+    # Features of other boards can't be voted on through this board
+    response = client.post("/boards/mobile/votes", json={"feature_id": legacy_id}, headers=voter_headers)
+    assert response.status_code == 404
+    response = client.post("/votes/", json={"feature_id": feature_id}, headers=voter_headers)
+    assert response.status_code == 404
+    response = client.delete(f"/votes/{feature_id}", headers=voter_headers)
+    assert response.status_code == 404
+
+    response = client.delete(f"/boards/mobile/votes/{feature_id}", headers=voter_headers)
+    assert response.status_code == 200
+    assert client.get(f"/boards/mobile/features/{feature_id}").json()["vote_count"] == 0
+
+def failing_add_feature(db, *args):
+    db.flush()
+    raise RuntimeError("insert failed")
+
+def allocated_ids() -> list:
+    db = TestingSessionLocal()
+    try:
+        return [row.id for row in db.query(FeatureId.id)]
+    finally:
+        db.close()
+
+def test_default_board_feature_uses_one_writer_transaction(client: TestClient, monkeypatch):
+    headers = get_auth_headers(client)
+    # Track the most writer connections held at once
+    held = [0, 0]
+    def checkout(*args):
+        held[0] += 1
+        held[1] = max(held)
+    def checkin(*args):
+        held[0] -= 1
+    event.listen(writer_engine, "checkout", checkout)
+    event.listen(writer_engine, "checkin", checkin)
+    try:
+        create_board_feature(client, "default", headers)
+    finally:
+        event.remove(writer_engine, "checkout", checkout)
+        event.remove(writer_engine, "checkin", checkin)
+    assert held[1] == 1
+
+    # The id is rolled back with a failed insert
+    before = allocated_ids()
+    monkeypatch.setattr(boards, "add_feature", failing_add_feature)
+    with pytest.raises(RuntimeError):
+        client.post("/boards/default/features", json={"title": "Lost"}, headers=headers)
+    assert allocated_ids() == before
+
+def test_remote_board_feature_commits_the_id_first(client: TestClient, monkeypatch):
+    headers = get_auth_headers(client)
+    create_board(client, headers)
+    move("mobile", "secondary")
+    feature_id = create_board_feature(client, "mobile", headers)
+    assert feature_id in allocated_ids()
+
+    # A failed shard insert only skips the id it was given
+    monkeypatch.setattr(boards, "add_feature", failing_add_feature)
+    with pytest.raises(RuntimeError):
+        client.post("/boards/mobile/features", json={"title": "Lost"}, headers=headers)
+    assert allocated_ids()[-1] == feature_id + 1
+
+def test_default_board_writes_refresh_cached_lists(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    feature_id = create_board_feature(client, "default", author_headers)
+    assert client.get("/features/").json()["items"][0]["vote_count"] == 0
+
+    voter_headers = get_auth_headers(client, "voter@example.com")
+    client.post("/boards/default/votes", json={"feature_id": feature_id}, headers=voter_headers)
+    assert client.get("/features/").json()["items"][0]["vote_count"] == 1
+
+def test_move_board_between_shards(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    voter_headers = get_auth_headers(client, "voter@example.com")
+    create_board(client, author_headers)
+    feature_ids = [create_board_feature(client, "mobile", author_headers, f"Feature {i}") for i in range(5)]
+    for feature_id in feature_ids[:3]:
+        client.post("/boards/mobile/votes", json={"feature_id": feature_id}, headers=voter_headers)
+    legacy_id = create_feature(client, author_headers)
+    before = client.get("/boards/mobile/features").json()
+
+    assert move("mobile", "secondary") == 5
+
+    db = TestingSessionLocal()
+    board = db.query(Board).filter(Board.slug == "mobile").first()
+    assert board.shard == "secondary"
+    assert board.moving_to is None
+    # Only the default board is left on the source shard
+    assert [feature.id for feature in db.query(Feature)] == [legacy_id]
+    assert db.query(Vote).count() == 0
+    db.close()
+
+    assert client.get("/boards/mobile/features").json() == before
+    item = client.get(f"/boards/mobile/features/{feature_ids[0]}").json()
+    assert item["vote_count"] == 1
+
+    # The board keeps working on its new shard
+    response = client.post("/boards/mobile/votes", json={"feature_id": feature_ids[4]}, headers=voter_headers)
+    assert response.status_code == 200
+    new_id = create_board_feature(client, "mobile", author_headers, "After move")
+    assert new_id > max(feature_ids + [legacy_id])
+
+    shard_db = shards["secondary"].SessionLocal()
+    assert shard_db.query(Vote).count() == 4
+    shard_db.close()
+
+    # And can move back
+    assert move("mobile", "default") == 6
+    assert client.get(f"/boards/mobile/features/{new_id}").status_code == 200
+
+def test_votes_keep_their_ids_across_a_move(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    voter_headers = get_auth_headers(client, "voter@example.com")
+    create_board(client, author_headers, "mobile")
+    create_board(client, author_headers, "web")
+    move("web", "secondary")
+    web_feature = create_board_feature(client, "web", author_headers)
+    web_vote = client.post("/boards/web/votes", json={"feature_id": web_feature}, headers=voter_headers).json()
+    mobile_feature = create_board_feature(client, "mobile", author_headers)
+    mobile_vote = client.post("/boards/mobile/votes", json={"feature_id": mobile_feature}, headers=voter_headers).json()
+    assert mobile_vote["id"] != web_vote["id"]
+
+    # Joining a shard that already holds another board's votes
+    move("mobile", "secondary")
+
+    items = client.get("/users/me/votes?board=mobile", headers=voter_headers).json()["items"]
+    assert [item["id"] for item in items] == [mobile_vote["id"]]
+    items = client.get("/users/me/votes?board=web", headers=voter_headers).json()["items"]
+    assert [item["id"] for item in items] == [web_vote["id"]]
+
+def test_sync_board_catches_up_with_changes(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    voter_headers = get_auth_headers(client, "voter@example.com")
+    board_id = create_board(client, author_headers)["id"]
+    feature_id = create_board_feature(client, "mobile", author_headers)
+    source, target = shards["default"], shards["secondary"]
+
+    assert sync_board(board_id, source, target, batch_size=10) == 1
+    assert sync_board(board_id, source, target, batch_size=10) == 0
+
+    # A vote writes the vote, its hourly rollup and the voter sketch
+    client.post("/boards/mobile/votes", json={"feature_id": feature_id}, headers=voter_headers)
+    assert sync_board(board_id, source, target, batch_size=10) == 3
+    client.delete(f"/boards/mobile/votes/{feature_id}", headers=voter_headers)
+    sync_board(board_id, source, target, batch_size=10)
+
+    shard_db = target.SessionLocal()
+    assert shard_db.query(Vote).count() == 0
+    shard_db.close()
+
+def test_catch_up_copies_only_features_changed_since_the_mark(client: TestClient, monkeypatch):
+    author_headers = get_auth_headers(client, "author@example.com")
+    voter_headers = get_auth_headers(client, "voter@example.com")
+    board_id = create_board(client, author_headers)["id"]
+    feature_ids = [create_board_feature(client, "mobile", author_headers, f"Feature {i}") for i in range(4)]
+    source, target = shards["default"], shards["secondary"]
+
+    mark = board_change_mark(source, board_id)
+    sync_board(board_id, source, target, batch_size=10)
+    client.post("/boards/mobile/votes", json={"feature_id": feature_ids[2]}, headers=voter_headers)
+    client.post("/votes/", json={"feature_id": create_feature(client, author_headers)}, headers=voter_headers)
+
+    synced = []
+    sync_features = sharding.sync_features
+    def record(ids, *args):
+        synced.append(list(ids))
+        return sync_features(ids, *args)
+    monkeypatch.setattr(sharding, "sync_features", record)
+    assert sync_board_changes(board_id, source, target, mark, batch_size=10) == 3
+    assert synced == [[feature_ids[2]]]
+
+    shard_db = target.SessionLocal()
+    assert [vote.feature_id for vote in shard_db.query(Vote)] == [feature_ids[2]]
+    shard_db.close()
+
+def test_unique_voters_spans_shards(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    create_board(client, author_headers)
+    feature_id = create_board_feature(client, "mobile", author_headers)
+    legacy_id = create_feature(client, author_headers)
+    for i in range(3):
+        headers = get_auth_headers(client, f"voter{i}@example.com")
+        client.post("/boards/mobile/votes", json={"feature_id": feature_id}, headers=headers)
+        client.post("/votes/", json={"feature_id": legacy_id}, headers=get_auth_headers(client, f"other{i}@example.com"))
+
+    move("mobile", "secondary")
+
+    assert client.get("/analytics/unique-voters").json()["unique_voters"] == 6
+    data = client.get(f"/analytics/unique-voters?feature_id={feature_id}").json()
+    assert data["unique_voters"] == 3
+
+def test_writes_refused_while_board_is_moving(client: TestClient):
+    headers = get_auth_headers(client)
+    create_board(client, headers)
+
+    db = TestingWriteSessionLocal()
+    db.query(Board).filter(Board.slug == "mobile").update({"moving_to": "secondary"})
+    db.commit()
+    db.close()
+
+    response = client.post("/boards/mobile/features", json={"title": "Blocked"}, headers=headers)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+    assert client.get("/boards/mobile/features").status_code == 200
+
+def load_board(slug: str) -> Board:
+    db = TestingSessionLocal()
+    try:
+        return db.query(Board).filter(Board.slug == slug).first()
+    finally:
+        db.close()
+
+def test_move_waits_for_writes_already_in_flight(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    create_board(client, author_headers)
+    feature_id = create_board_feature(client, "mobile", author_headers)
+    move("mobile", "secondary")
+    stale_board = load_board("mobile")
+
+    # A write that got past the moving_to check before the move began
+    writes = get_board_write_db(stale_board)
+    db = next(writes)
+    mover = threading.Thread(target=move, args=("mobile", "default"))
+    mover.start()
+    time.sleep(0.5)
+    db.add(Vote(id=999, user_id=999, feature_id=feature_id))
+    db.commit()
+    writes.close()
+    mover.join()
+
+    assert load_board("mobile").shard == "default"
+    item = client.get(f"/boards/mobile/features/{feature_id}").json()
+    assert item["vote_count"] == 1
+
+    # Writes routed with the old shard are refused there from now on
+    with pytest.raises(HTTPException) as refused:
+        next(get_board_write_db(stale_board))
+    assert refused.value.status_code == 503
+
+def test_move_board_rejects_invalid_moves(client: TestClient):
+    headers = get_auth_headers(client)
+    create_board(client, headers)
+
+    with pytest.raises(ValueError):
+        move("default", "secondary")
+    with pytest.raises(ValueError):
+        move("mobile", "default")
+    with pytest.raises(ValueError):
+        move("missing", "secondary")
+    with pytest.raises(LookupError):
+        move("mobile", "nowhere")
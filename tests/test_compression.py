@@ -0,0 +1,67 @@
+import pytest
+import gzip
+from fastapi.testclient import TestClient
+from app.compression import choose_encoding, response_cache
+from tests.test_votes import get_auth_headers
+
+def create_features(client: TestClient, headers: dict, count: int):
+    for i in range(count):
+        client.post(
+            "/features/",
+            json={"title": f"Feature {i}", "description": "A fairly long description " * 10},
+            headers=headers
+        )
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("*") in ("br", "gzip")
+
+def test_large_response_is_gzipped(client: TestClient):
+    headers = get_auth_headers(client)
+    create_features(client, headers, 5)
+
+    response = client.get("/features/", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()["items"]) == 5
+
+def test_small_response_is_not_compressed(client: TestClient):
+    response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"status": "healthy"}
+
+def test_list_page_cached_with_compressed_variant(client: TestClient):
+    headers = get_auth_headers(client)
+    create_features(client, headers, 5)
+
+    client.get("/features/", headers={"Accept-Encoding": "gzip"})
+    entry = response_cache.get("json:/features/?")
+    assert entry is not None
+    assert gzip.decompress(entry.variants["gzip"]) == entry.body
+
+    cached = client.get("/features/", headers={"Accept-Encoding": "identity"})
+    assert cached.content == entry.body
+
+def test_cache_invalidated_on_write(client: TestClient):
+    headers = get_auth_headers(client)
+    create_features(client, headers, 1)
+    assert client.get("/features/").json()["total"] == 1
+
+    create_features(client, headers, 1)
+    assert client.get("/features/").json()["total"] == 2
+
+def test_later_pages_not_cached(client: TestClient):
+    client.get("/features/?page=10")
+    assert response_cache.get("json:/features/?page=10") is None
+
+def test_brotli_preferred_when_available(client: TestClient):
+    brotli = pytest.importorskip("brotli")
+    headers = get_auth_headers(client)
+    create_features(client, headers, 5)
+
+    response = client.get("/features/", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert len(response.json()["items"]) == 5
@@ -0,0 +1,31 @@
+from sqlalchemy import text
+from tests.conftest import engine, writer_engine
+
+def test_sqlite_pragmas_applied():
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        # NORMAL == 1
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -64000
+
+def test_writer_engine_uses_single_connection():
+    assert writer_engine.pool.size() == 1
+    assert writer_engine.pool._max_overflow == 0
+
+def test_concurrent_votes_do_not_lock(client):
+    from concurrent.futures import ThreadPoolExecutor
+    from tests.test_votes import get_auth_headers, create_feature
+
+    author_headers = get_auth_headers(client, "author@example.com")
+    feature_id = create_feature(client, author_headers)
+    voters = [get_auth_headers(client, f"voter{i}@example.com") for i in range(4)]
+
+    def vote(headers):
+        return client.post("/votes/", json={"feature_id": feature_id}, headers=headers).status_code
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        statuses = list(pool.map(vote, voters))
+
+    assert statuses == [200] * 4
+    assert client.get(f"/features/{feature_id}").json()["vote_count"] == 4
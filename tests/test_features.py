@@ -1,5 +1,8 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.schemas import FeatureResponse, FeatureSparseResponse
+from tests.conftest import engine
 
 def get_auth_headers(client: TestClient, email: str = "test@example.com", password: str = "testpassword123"):
     # Register and login user
@@ -113,4 +116,81 @@ def test_get_feature_by_id(client: TestClient):
 def test_get_nonexistent_feature(client: TestClient):
     response = client.get("/features/999")
     assert response.status_code == 404
-    assert response.json()["detail"] == "Feature not found"
\ No newline at end of file
+    assert response.json()["detail"] == "Feature not found"
+def test_list_features_sparse_fields(client: TestClient):
+    headers = get_auth_headers(client)
+    client.post(
+        "/features/",
+        json={"title": "Feature 1", "description": "First feature"},
+        headers=headers
+    )
+    
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        response = client.get("/features/?fields=title,vote_count")
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    
+    assert response.status_code == 200
+    item = response.json()["items"][0]
+    assert item == {"id": item["id"], "title": "Feature 1", "vote_count": 0}
+    FeatureSparseResponse.model_validate(item)
+    list_query = [s for s in statements if "FROM features" in s and "count(features.id)" not in s][0]
+    assert "users" not in list_query
+    assert "description" not in list_query
+
+def test_list_features_include_author(client: TestClient):
+    headers = get_auth_headers(client)
+    client.post("/features/", json={"title": "Feature 1"}, headers=headers)
+    
+    response = client.get("/features/?fields=title&include=author")
+    item = response.json()["items"][0]
+    assert item["author"]["email"] == "test@example.com"
+    assert "description" not in item
+    FeatureSparseResponse.model_validate(item)
+
+def test_get_feature_default_shape_matches_schema(client: TestClient):
+    headers = get_auth_headers(client)
+    feature_id = client.post("/features/", json={"title": "Feature 1"}, headers=headers).json()["id"]
+    
+    response = client.get(f"/features/{feature_id}")
+    FeatureResponse.model_validate(response.json())
+
+def test_unknown_field_rejected(client: TestClient):
+    response = client.get("/features/?fields=title,password_hash")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown field: password_hash"
+    
+    response = client.get("/features/?include=votes")
+    assert response.status_code == 400
+
+def test_batch_get_preserves_order_and_marks_missing(client: TestClient):
+    headers = get_auth_headers(client)
+    first = client.post("/features/", json={"title": "Feature 1"}, headers=headers).json()["id"]
+    second = client.post("/features/", json={"title": "Feature 2"}, headers=headers).json()["id"]
+    
+    response = client.get(f"/features/batch?ids={second},999,{first}")
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [item["id"] for item in items] == [second, 999, first]
+    assert items[0]["title"] == "Feature 2"
+    assert items[1] == {"id": 999, "error": "Feature not found"}
+    assert items[2]["vote_count"] == 0
+    FeatureResponse.model_validate(items[2])
+
+def test_batch_post_with_sparse_fields(client: TestClient):
+    headers = get_auth_headers(client)
+    feature_id = client.post("/features/", json={"title": "Feature 1"}, headers=headers).json()["id"]
+    
+    response = client.post("/features/batch?fields=title", json={"ids": [feature_id]})
+    assert response.status_code == 200
+    assert response.json()["items"] == [{"id": feature_id, "title": "Feature 1"}]
+
+def test_batch_rejects_invalid_ids(client: TestClient):
+    assert client.get("/features/batch?ids=1,abc").status_code == 400
+    assert client.post("/features/batch", json={"ids": []}).status_code == 400
+    too_many = ",".join(str(i) for i in range(101))
+    assert client.get(f"/features/batch?ids={too_many}").status_code == 400
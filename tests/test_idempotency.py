@@ -0,0 +1,102 @@
+import asyncio
+from fastapi.testclient import TestClient
+from app.idempotency import IdempotencyMiddleware, IdempotencyStore, StoredResponse
+from tests.test_votes import get_auth_headers, create_feature
+
+def test_retried_feature_creation_is_replayed(client: TestClient):
+    headers = {**get_auth_headers(client), "Idempotency-Key": "create-1"}
+    payload = {"title": "New Feature", "description": "A great new feature"}
+
+    first = client.post("/features/", json=payload, headers=headers)
+    second = client.post("/features/", json=payload, headers=headers)
+
+    assert first.status_code == 200
+    assert second.content == first.content
+    assert second.headers["idempotency-replayed"] == "true"
+    assert client.get("/features/").json()["total"] == 1
+
+def test_retried_vote_replays_success(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    feature_id = create_feature(client, author_headers)
+    voter_headers = {**get_auth_headers(client, "voter@example.com"), "Idempotency-Key": "vote-1"}
+
+    first = client.post("/votes/", json={"feature_id": feature_id}, headers=voter_headers)
+    second = client.post("/votes/", json={"feature_id": feature_id}, headers=voter_headers)
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.content == first.content
+
+def test_retried_board_writes_are_replayed(client: TestClient):
+    author_headers = {**get_auth_headers(client, "author@example.com"), "Idempotency-Key": "board-feature-1"}
+    payload = {"title": "Board Feature"}
+    first = client.post("/boards/default/features", json=payload, headers=author_headers)
+    second = client.post("/boards/default/features", json=payload, headers=author_headers)
+    assert second.content == first.content
+    assert second.headers["idempotency-replayed"] == "true"
+
+    voter_headers = {**get_auth_headers(client, "voter@example.com"), "Idempotency-Key": "board-vote-1"}
+    vote = {"feature_id": first.json()["id"]}
+    first = client.post("/boards/default/votes", json=vote, headers=voter_headers)
+    second = client.post("/boards/default/votes", json=vote, headers=voter_headers)
+    assert first.status_code == 200
+    assert second.content == first.content
+
+def test_key_reused_with_different_body(client: TestClient):
+    headers = {**get_auth_headers(client), "Idempotency-Key": "create-1"}
+    client.post("/features/", json={"title": "One"}, headers=headers)
+
+    response = client.post("/features/", json={"title": "Two"}, headers=headers)
+    assert response.status_code == 422
+
+def test_keys_are_scoped_per_user(client: TestClient):
+    first_headers = {**get_auth_headers(client, "one@example.com"), "Idempotency-Key": "same"}
+    second_headers = {**get_auth_headers(client, "two@example.com"), "Idempotency-Key": "same"}
+
+    client.post("/features/", json={"title": "Feature"}, headers=first_headers)
+    response = client.post("/features/", json={"title": "Feature"}, headers=second_headers)
+    assert "idempotency-replayed" not in response.headers
+    assert client.get("/features/").json()["total"] == 2
+
+def test_concurrent_duplicates_execute_once():
+    calls = []
+
+    async def slow_app(scope, receive, send):
+        await receive()
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": str(len(calls)).encode()})
+
+    middleware = IdempotencyMiddleware(slow_app, IdempotencyStore(ttl=60, max_entries=10))
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/votes/",
+        "headers": [(b"idempotency-key", b"abc")],
+    }
+
+    async def request():
+        sent = []
+        async def receive():
+            return {"type": "http.request", "body": b"{}", "more_body": False}
+        async def send(message):
+            sent.append(message)
+        await middleware(scope, receive, send)
+        return sent[-1]["body"]
+
+    async def run():
+        return await asyncio.gather(request(), request(), request())
+
+    assert asyncio.run(run()) == [b"1", b"1", b"1"]
+    assert len(calls) == 1
+
+def test_store_expires_and_bounds_entries():
+    store = IdempotencyStore(ttl=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        store.put(key, StoredResponse("f", 200, [], b""))
+    assert store.get("a") is None
+    assert store.get("c") is not None
+
+    store.ttl = 0
+    assert store.get("c") is None
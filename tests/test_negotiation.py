@@ -0,0 +1,68 @@
+from datetime import datetime
+import msgpack
+from fastapi.testclient import TestClient
+from app.negotiation import accepts_msgpack
+from tests.test_votes import get_auth_headers, create_feature
+
+MSGPACK = {"Accept": "application/msgpack"}
+
+def test_accepts_msgpack():
+    assert accepts_msgpack("application/msgpack")
+    assert accepts_msgpack("application/x-msgpack, application/json;q=0.5")
+    assert not accepts_msgpack("application/json")
+    assert not accepts_msgpack("application/json, application/msgpack;q=0.5")
+    assert not accepts_msgpack("application/msgpack;q=0")
+
+def test_list_features_as_msgpack(client: TestClient):
+    headers = get_auth_headers(client)
+    create_feature(client, headers, "Feature 1")
+
+    response = client.get("/features/", headers=MSGPACK)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert "Accept" in response.headers["vary"]
+    data = msgpack.unpackb(response.content, timestamp=3)
+    assert data["total"] == 1
+    item = data["items"][0]
+    assert item["title"] == "Feature 1"
+    assert isinstance(item["created_at"], datetime)
+    assert isinstance(item["author"]["created_at"], datetime)
+
+def test_json_remains_default(client: TestClient):
+    response = client.get("/features/")
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["items"] == []
+
+def test_response_model_routes_as_msgpack(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    feature_id = create_feature(client, author_headers)
+    voter_headers = get_auth_headers(client, "voter@example.com")
+
+    response = client.post("/votes/", json={"feature_id": feature_id}, headers={**voter_headers, **MSGPACK})
+    assert response.status_code == 200
+    data = msgpack.unpackb(response.content, timestamp=3)
+    assert data["feature_id"] == feature_id
+    assert isinstance(data["created_at"], datetime)
+
+def test_errors_stay_json(client: TestClient):
+    response = client.get("/features/999", headers=MSGPACK)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Feature not found"
+
+def test_list_response_model_as_msgpack(client: TestClient):
+    headers = get_auth_headers(client)
+    client.post("/boards/", json={"slug": "mobile", "name": "Mobile"}, headers=headers)
+
+    response = client.get("/boards/", headers=MSGPACK)
+    assert response.status_code == 200
+    boards = msgpack.unpackb(response.content, timestamp=3)
+    assert [board["slug"] for board in boards] == ["default", "mobile"]
+    assert isinstance(boards[1]["created_at"], datetime)
+
+def test_dates_as_msgpack(client: TestClient):
+    response = client.get("/analytics/unique-voters?start=2025-01-01&end=2025-01-07", headers=MSGPACK)
+    assert response.status_code == 200
+    data = msgpack.unpackb(response.content)
+    assert data["start"] == "2025-01-01"
+    assert data["end"] == "2025-01-07"
+    assert data["unique_voters"] == 0
@@ -0,0 +1,122 @@
+from collections import defaultdict
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from app import outbox
+from app.models import OutboxEvent
+from tests.conftest import TestingWriteSessionLocal
+from tests.test_votes import get_auth_headers, create_feature
+
+@pytest.fixture
+def handlers(monkeypatch):
+    registry = defaultdict(list)
+    monkeypatch.setattr(outbox, "handlers", registry)
+    return registry
+
+def pending_events():
+    db = TestingWriteSessionLocal()
+    try:
+        return db.query(OutboxEvent).filter(OutboxEvent.processed_at.is_(None)).all()
+    finally:
+        db.close()
+
+def test_writes_record_outbox_events(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    feature_id = create_feature(client, author_headers)
+    voter_headers = get_auth_headers(client, "voter@example.com")
+    client.post("/votes/", json={"feature_id": feature_id}, headers=voter_headers)
+    client.delete(f"/votes/{feature_id}", headers=voter_headers)
+
+    events = pending_events()
+    assert [event.topic for event in events] == ["feature.created", "vote.created", "vote.deleted"]
+    assert all(event.aggregate_id == feature_id for event in events)
+
+def test_failed_write_records_no_event(client: TestClient):
+    headers = get_auth_headers(client)
+    feature_id = create_feature(client, headers)
+    client.post("/votes/", json={"feature_id": feature_id}, headers=headers)
+
+    assert [event.topic for event in pending_events()] == ["feature.created"]
+
+def test_dispatch_coalesces_events_per_feature(client: TestClient, handlers):
+    calls = []
+    handlers["vote.created"].append(lambda feature_id, payloads: calls.append((feature_id, payloads)))
+
+    author_headers = get_auth_headers(client, "author@example.com")
+    feature_id = create_feature(client, author_headers)
+    for i in range(3):
+        voter_headers = get_auth_headers(client, f"voter{i}@example.com")
+        client.post("/votes/", json={"feature_id": feature_id}, headers=voter_headers)
+
+    assert outbox.dispatch_once(TestingWriteSessionLocal) == 4
+    assert len(calls) == 1
+    assert calls[0][0] == feature_id
+    assert len(calls[0][1]) == 3
+    assert pending_events() == []
+    assert outbox.dispatch_once(TestingWriteSessionLocal) == 0
+
+def test_failed_handler_retried_with_backoff(client: TestClient, handlers):
+    attempts = []
+    def flaky(feature_id, payloads):
+        attempts.append(feature_id)
+        if len(attempts) == 1:
+            raise RuntimeError("notification service down")
+    handlers["feature.created"].append(flaky)
+
+    create_feature(client, get_auth_headers(client))
+    outbox.dispatch_once(TestingWriteSessionLocal)
+
+    event = pending_events()[0]
+    assert event.attempts == 1
+    assert "notification service down" in event.last_error
+    assert event.available_at > datetime.utcnow()
+    # Not due yet
+    assert outbox.dispatch_once(TestingWriteSessionLocal) == 0
+
+    db = TestingWriteSessionLocal()
+    db.query(OutboxEvent).update({"available_at": datetime.utcnow()})
+    db.commit()
+    db.close()
+    assert outbox.dispatch_once(TestingWriteSessionLocal) == 1
+    assert pending_events() == []
+    assert len(attempts) == 2
+
+def test_backoff_grows_and_caps():
+    assert outbox.backoff(1).total_seconds() == 2
+    assert outbox.backoff(3).total_seconds() == 8
+    assert outbox.backoff(20).total_seconds() == outbox.OUTBOX_BACKOFF_MAX
+
+def test_handlers_run_without_holding_a_connection(client: TestClient, handlers):
+    writes = []
+    def handler(feature_id, payloads):
+        # The single SQLite writer connection must be free for requests
+        db = TestingWriteSessionLocal()
+        try:
+            db.query(OutboxEvent).filter(OutboxEvent.id == -1).update({"attempts": 0})
+            db.commit()
+            writes.append(feature_id)
+        finally:
+            db.close()
+    handlers["feature.created"].append(handler)
+
+    feature_id = create_feature(client, get_auth_headers(client))
+    assert outbox.dispatch_once(TestingWriteSessionLocal) == 1
+    assert writes == [feature_id]
+    assert pending_events() == []
+
+def test_expired_lease_is_reclaimed(client: TestClient, handlers):
+    create_feature(client, get_auth_headers(client))
+    lease_until, claimed = outbox.claim_batch(TestingWriteSessionLocal, 10)
+    assert len(claimed) == 1
+    # Leased events are invisible to other dispatchers until the lease ends
+    assert outbox.dispatch_once(TestingWriteSessionLocal) == 0
+
+    db = TestingWriteSessionLocal()
+    db.query(OutboxEvent).update({"available_at": datetime.utcnow()})
+    db.commit()
+    db.close()
+    assert outbox.dispatch_once(TestingWriteSessionLocal) == 1
+
+    # The first dispatcher's late outcome no longer applies
+    outbox.record_outcome(TestingWriteSessionLocal, lease_until, [], [(claimed[0][0], 1, "late")])
+    assert pending_events() == []
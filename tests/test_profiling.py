@@ -0,0 +1,70 @@
+import json
+import os
+from fastapi.testclient import TestClient
+from app import profiling
+from tests.test_votes import get_auth_headers, create_feature
+
+def test_request_not_profiled_by_default(client: TestClient, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    response = client.get("/features/", headers={"X-Profile": "anything"})
+    assert "x-profile-id" not in response.headers
+    assert os.listdir(tmp_path) == []
+
+def test_profile_written_for_authorized_header(client: TestClient, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    headers = get_auth_headers(client)
+    create_feature(client, headers)
+
+    assert "x-profile-id" not in client.get("/features/?page=4", headers={"X-Profile": "wrong"}).headers
+    response = client.get("/features/?page=4", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    with open(tmp_path / f"{profile_id}.json") as f:
+        meta = json.load(f)
+    assert meta["path"] == "/features/"
+    assert meta["query"] == "page=4"
+    assert meta["status"] == 200
+    assert any("FROM features" in query["statement"] for query in meta["sql"])
+    assert (tmp_path / f"{profile_id}.collapsed").exists()
+
+    assert [p["id"] for p in profiling.list_profiles(str(tmp_path))] == [profile_id]
+    summary = profiling.summarize(profile_id, str(tmp_path))
+    assert "GET /features/?page=4 -> 200" in summary
+    assert "Slowest queries:" in summary
+
+def test_sample_rate_profiles_without_header(client: TestClient, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1.0)
+
+    response = client.get("/health")
+    assert "x-profile-id" in response.headers
+    assert len(profiling.list_profiles(str(tmp_path))) == 1
+
+def test_worker_threads_released_when_their_connections_are(client: TestClient, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1.0)
+    seen = []
+
+    class RecordingProfile(profiling.Profile):
+        def enter(self, ident):
+            super().enter(ident)
+            seen.append(ident)
+
+        def stop(self):
+            self.threads_at_stop = dict(self.threads)
+            super().stop()
+
+    profiles = []
+    def make_profile(*args):
+        profiles.append(RecordingProfile(*args))
+        return profiles[-1]
+    monkeypatch.setattr(profiling, "Profile", make_profile)
+
+    assert client.get("/features/").status_code == 200
+    profile = profiles[0]
+    assert seen
+    # Only the event loop thread is still charged once the request is done
+    assert len(profile.threads_at_stop) == 1
+    assert profile.threads == {}
@@ -0,0 +1,63 @@
+import asyncio
+from fastapi.testclient import TestClient
+from app.ratelimit import InMemoryBackend, RateLimit, RATE_LIMITS
+from tests.test_votes import get_auth_headers, create_feature
+
+def test_token_bucket_refills():
+    now = [0.0]
+    backend = InMemoryBackend(clock=lambda: now[0])
+    limit = RateLimit("test", "2/10", "ip")
+
+    take = lambda: asyncio.run(backend.take("key", limit))
+    assert take() == (True, 0.0)
+    assert take() == (True, 0.0)
+    allowed, retry_after = take()
+    assert not allowed
+    assert retry_after == 5.0
+
+    now[0] = 5.0
+    assert take()[0]
+
+def test_login_rate_limited_before_password_check(client: TestClient, monkeypatch):
+    client.post(
+        "/auth/register",
+        json={"name": "Test User", "email": "test@example.com", "password": "testpassword123"}
+    )
+    capacity = RATE_LIMITS[("POST", "/auth/login")].capacity
+    for _ in range(capacity):
+        response = client.post("/auth/login", data={"username": "test@example.com", "password": "wrong"})
+        assert response.status_code == 401
+
+    calls = []
+    monkeypatch.setattr("app.routers.auth.authenticate_user", lambda *args: calls.append(args))
+    response = client.post("/auth/login", data={"username": "test@example.com", "password": "wrong"})
+    assert response.status_code == 429
+    assert response.json()["detail"] == "Too many requests"
+    assert int(response.headers["retry-after"]) >= 1
+    assert calls == []
+
+def test_board_votes_share_the_vote_limit(client: TestClient, monkeypatch):
+    limit = RateLimit("vote", "1/60", "user")
+    monkeypatch.setitem(RATE_LIMITS, ("POST", "/votes/"), limit)
+    monkeypatch.setitem(RATE_LIMITS, ("POST", "/boards/{slug}/votes"), limit)
+    author_headers = get_auth_headers(client, "author@example.com")
+    first_feature = create_feature(client, author_headers, "First")
+    second_feature = create_feature(client, author_headers, "Second")
+    voter_headers = get_auth_headers(client, "voter@example.com")
+
+    assert client.post("/votes/", json={"feature_id": first_feature}, headers=voter_headers).status_code == 200
+    response = client.post("/boards/default/votes", json={"feature_id": second_feature}, headers=voter_headers)
+    assert response.status_code == 429
+
+def test_votes_limited_per_user(client: TestClient, monkeypatch):
+    monkeypatch.setitem(RATE_LIMITS, ("POST", "/votes/"), RateLimit("vote", "1/60", "user"))
+    author_headers = get_auth_headers(client, "author@example.com")
+    first_feature = create_feature(client, author_headers, "First")
+    second_feature = create_feature(client, author_headers, "Second")
+    voter_headers = get_auth_headers(client, "voter@example.com")
+    other_headers = get_auth_headers(client, "other@example.com")
+
+    assert client.post("/votes/", json={"feature_id": first_feature}, headers=voter_headers).status_code == 200
+    assert client.post("/votes/", json={"feature_id": second_feature}, headers=voter_headers).status_code == 429
+    # Same client address, different user: separate bucket
+    assert client.post("/votes/", json={"feature_id": first_feature}, headers=other_headers).status_code == 200
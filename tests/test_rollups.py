@@ -0,0 +1,88 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.models import Vote, VoteRollup
+from app.rollups import backfill, bucket_for
+from tests.conftest import TestingWriteSessionLocal
+from tests.test_votes import get_auth_headers, create_feature
+
+def vote_from(client: TestClient, feature_id: int, count: int):
+    for i in range(count):
+        headers = get_auth_headers(client, f"voter{i}@example.com")
+        client.post("/votes/", json={"feature_id": feature_id}, headers=headers)
+
+def test_stats_counts_votes_in_current_hour(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    feature_id = create_feature(client, author_headers)
+    vote_from(client, feature_id, 3)
+
+    response = client.get(f"/features/{feature_id}/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["buckets"]) == 24
+    assert data["buckets"][-1]["count"] == 3
+    assert data["total"] == 3
+
+def test_stats_tracks_vote_removal(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    feature_id = create_feature(client, author_headers)
+    vote_from(client, feature_id, 2)
+    client.delete(f"/votes/{feature_id}", headers=get_auth_headers(client, "voter0@example.com"))
+
+    data = client.get(f"/features/{feature_id}/stats?resolution=1d").json()
+    assert data["total"] == 1
+
+def test_stats_groups_hours_into_coarser_buckets(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    feature_id = create_feature(client, author_headers)
+
+    db = TestingWriteSessionLocal()
+    start = datetime(2025, 1, 1)
+    for hour in (0, 1, 5, 7):
+        db.add(VoteRollup(feature_id=feature_id, bucket_start=start + timedelta(hours=hour), count=2))
+    db.commit()
+    db.close()
+
+    response = client.get(
+        f"/features/{feature_id}/stats",
+        params={"start": "2025-01-01T00:00:00", "end": "2025-01-01T12:00:00", "resolution": "6h"}
+    )
+    data = response.json()
+    assert [bucket["count"] for bucket in data["buckets"]] == [6, 2]
+
+def test_stats_rejects_bad_resolution(client: TestClient):
+    response = client.get("/features/1/stats?resolution=5m")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid resolution"
+
+@pytest.mark.parametrize("resolution", ["1000000w", "999999999999w", "0h"])
+def test_stats_rejects_oversized_resolution(client: TestClient, resolution: str):
+    response = client.get(f"/features/1/stats?resolution={resolution}")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid resolution"
+
+def test_stats_rejects_range_out_of_bounds(client: TestClient):
+    response = client.get("/features/1/stats", params={"end": "0001-01-02T00:00:00", "resolution": "1w"})
+    assert response.status_code == 400
+
+def test_stats_for_nonexistent_feature(client: TestClient):
+    response = client.get("/features/999/stats")
+    assert response.status_code == 404
+
+def test_backfill_rebuilds_rollups(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    feature_id = create_feature(client, author_headers)
+    voter_headers = get_auth_headers(client, "voter@example.com")
+    voter_id = client.post("/votes/", json={"feature_id": feature_id}, headers=voter_headers).json()["user_id"]
+
+    db = TestingWriteSessionLocal()
+    old = datetime(2024, 6, 1, 10, 30)
+    db.add(Vote(user_id=voter_id, feature_id=feature_id, created_at=old))
+    db.query(VoteRollup).delete()
+    db.commit()
+
+    assert backfill(db) == 2
+    rollups = {row.bucket_start: row.count for row in db.query(VoteRollup).all()}
+    db.close()
+    assert rollups[bucket_for(old)] == 1
+    assert sum(rollups.values()) == 2
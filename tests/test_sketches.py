@@ -0,0 +1,107 @@
+from datetime import datetime
+from fastapi.testclient import TestClient
+from app.models import VoterSketch
+from app.sketches import GLOBAL_STRIPES, HLL_RELATIVE_ERROR, HyperLogLog, global_stripe, record_voter, unique_voters
+from tests.conftest import TestingWriteSessionLocal
+from tests.test_rollups import vote_from
+from tests.test_votes import get_auth_headers, create_feature
+
+def test_hyperloglog_estimate_within_error_bound():
+    sketch = HyperLogLog()
+    for user_id in range(10000):
+        sketch.add(user_id)
+        sketch.add(user_id)  # duplicates must not count
+
+    assert abs(sketch.estimate() - 10000) / 10000 < 3 * HLL_RELATIVE_ERROR
+
+def test_hyperloglog_small_counts_are_exact_enough():
+    sketch = HyperLogLog()
+    for user_id in range(5):
+        sketch.add(user_id)
+    assert sketch.estimate() == 5
+    assert HyperLogLog().estimate() == 0
+
+def test_hyperloglog_merge_is_union():
+    first, second = HyperLogLog(), HyperLogLog()
+    for user_id in range(3000):
+        first.add(user_id)
+    for user_id in range(2000, 5000):
+        second.add(user_id)
+
+    merged = HyperLogLog(first.to_bytes()).merge(second)
+    assert abs(merged.estimate() - 5000) / 5000 < 3 * HLL_RELATIVE_ERROR
+
+def test_unique_voters_endpoint(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    first = create_feature(client, author_headers, "First")
+    second = create_feature(client, author_headers, "Second")
+    vote_from(client, first, 3)
+    vote_from(client, second, 2)
+
+    data = client.get("/analytics/unique-voters").json()
+    assert data["unique_voters"] == 3
+    assert data["is_estimate"] is True
+    assert data["relative_error"] == round(HLL_RELATIVE_ERROR, 4)
+
+    data = client.get(f"/analytics/unique-voters?feature_id={second}").json()
+    assert data["unique_voters"] == 2
+
+def test_unique_voters_outside_range(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    vote_from(client, create_feature(client, author_headers), 2)
+
+    response = client.get("/analytics/unique-voters?start=2020-01-01&end=2020-01-07")
+    assert response.json()["unique_voters"] == 0
+
+def test_unique_voters_rejects_inverted_range(client: TestClient):
+    response = client.get("/analytics/unique-voters?start=2020-01-07&end=2020-01-01")
+    assert response.status_code == 400
+
+def test_list_features_approximate_total(client: TestClient):
+    headers = get_auth_headers(client)
+    for i in range(3):
+        create_feature(client, headers, f"Feature {i}")
+
+    data = client.get("/features/?approximate=true").json()
+    assert data["total"] == 3
+    assert data["total_is_estimate"] is True
+    assert "total_is_estimate" not in client.get("/features/").json()
+
+def test_approximate_total_counts_only_the_default_board(client: TestClient):
+    headers = get_auth_headers(client)
+    create_feature(client, headers, "Default Feature")
+    client.post("/boards/", json={"slug": "mobile", "name": "Mobile"}, headers=headers)
+    for i in range(3):
+        client.post("/boards/mobile/features", json={"title": f"Mobile {i}"}, headers=headers)
+
+    data = client.get("/features/?approximate=true").json()
+    assert data["total"] == 1
+    assert data["pages"] == 1
+
+def test_record_voter_upserts_feature_and_stripe_rows(client: TestClient):
+    db = TestingWriteSessionLocal()
+    now = datetime.utcnow()
+    record_voter(db, 7, 1, now)
+    db.commit()
+    # A second transaction finding the rows already inserted upserts into them
+    record_voter(db, 7, 1, now)
+    db.commit()
+
+    rows = db.query(VoterSketch).order_by(VoterSketch.feature_id.desc()).all()
+    assert [row.feature_id for row in rows] == [7, global_stripe(1)]
+    assert all(HyperLogLog(row.registers).estimate() == 1 for row in rows)
+    db.close()
+
+def test_global_total_reads_only_the_stripes(client: TestClient):
+    db = TestingWriteSessionLocal()
+    now = datetime.utcnow()
+    for user_id in range(200):
+        record_voter(db, 1 + user_id % 50, user_id, now)
+    db.commit()
+
+    stripes = {row.feature_id for row in db.query(VoterSketch).filter(VoterSketch.feature_id < 0)}
+    assert stripes <= set(range(-GLOBAL_STRIPES, 0))
+    assert len(stripes) > 1
+    estimate = unique_voters(db, None, now.date(), now.date())
+    assert abs(estimate - 200) / 200 < 3 * HLL_RELATIVE_ERROR
+    db.close()
@@ -0,0 +1,98 @@
+import os
+import time
+from datetime import datetime
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+from app import snapshots
+from tests.conftest import TestingSessionLocal
+from tests.test_votes import get_auth_headers, create_feature
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_ENABLED", True)
+    monkeypatch.setattr(snapshots.snapshot_store, "directory", str(tmp_path))
+    monkeypatch.setattr(snapshots.snapshot_store, "db_healthy", True)
+    return snapshots.snapshot_store
+
+def test_publish_is_atomic_and_readable(store, tmp_path):
+    store.publish("example", {"items": [1, 2, 3]})
+    store.publish("example", {"items": [4]})
+    assert store.read("example")[0] == b'{"items":[4]}'
+    assert sorted(os.listdir(tmp_path)) == ["example.json", "example.msgpack"]
+
+def test_anonymous_reads_served_from_fresh_snapshot(client: TestClient, store):
+    headers = get_auth_headers(client)
+    create_feature(client, headers, "Published")
+    snapshots.publish_once(TestingSessionLocal, store)
+    create_feature(client, headers, "Not yet published")
+
+    response = client.get("/features/")
+    assert "x-snapshot-age" in response.headers
+    assert [item["title"] for item in response.json()["items"]] == ["Published"]
+
+    response = client.get("/features/top")
+    assert "x-snapshot-age" in response.headers
+
+    # Authenticated and non-default requests go to the database
+    assert len(client.get("/features/", headers=headers).json()["items"]) == 2
+    assert len(client.get("/features/?fields=title").json()["items"]) == 2
+
+def test_stale_snapshot_not_served_while_healthy(client: TestClient, store):
+    snapshots.publish_once(TestingSessionLocal, store)
+    old = time.time() - snapshots.SNAPSHOT_MAX_AGE - 1
+    os.utime(store.path("features-page-1"), (old, old))
+
+    response = client.get("/features/")
+    assert "x-snapshot-age" not in response.headers
+
+def test_stale_snapshot_served_when_db_unhealthy(client: TestClient, store):
+    headers = get_auth_headers(client)
+    create_feature(client, headers, "Published")
+    snapshots.publish_once(TestingSessionLocal, store)
+    old = time.time() - 3600
+    os.utime(store.path("features-page-1"), (old, old))
+    store.db_healthy = False
+
+    response = client.get("/features/", headers=headers)
+    assert response.status_code == 200
+    assert float(response.headers["x-snapshot-age"]) >= 3600
+    assert response.json()["items"][0]["title"] == "Published"
+
+def test_msgpack_clients_get_msgpack_snapshots(client: TestClient, store):
+    headers = get_auth_headers(client)
+    create_feature(client, headers, "Published")
+    snapshots.publish_once(TestingSessionLocal, store)
+    store.db_healthy = False
+
+    response = client.get("/features/", headers={**headers, "Accept": "application/msgpack"})
+    assert response.status_code == 200
+    assert "x-snapshot-age" in response.headers
+    assert response.headers["content-type"] == "application/msgpack"
+    data = msgpack.unpackb(response.content, timestamp=3)
+    assert data["items"][0]["title"] == "Published"
+    assert isinstance(data["items"][0]["created_at"], datetime)
+
+def test_snapshot_served_when_query_fails(client: TestClient, store, monkeypatch):
+    snapshots.publish_once(TestingSessionLocal, store)
+
+    def failing_query(*args, **kwargs):
+        raise OperationalError("SELECT 1", {}, Exception("database is down"))
+    monkeypatch.setattr("app.routers.features.feature_query", failing_query)
+
+    response = client.get("/features/", headers={"Authorization": "Bearer anything"})
+    assert response.status_code == 200
+    assert "x-snapshot-age" in response.headers
+
+def test_top_features_ordered_by_votes(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    quiet = create_feature(client, author_headers, "Quiet")
+    popular = create_feature(client, author_headers, "Popular")
+    for i in range(2):
+        voter_headers = get_auth_headers(client, f"voter{i}@example.com")
+        client.post("/votes/", json={"feature_id": popular}, headers=voter_headers)
+
+    items = client.get("/features/top").json()["items"]
+    assert [item["id"] for item in items] == [popular, quiet]
+    assert items[0]["vote_count"] == 2
@@ -0,0 +1,110 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from tests.conftest import engine
+from tests.test_boards import create_board, create_board_feature, move
+from tests.test_votes import get_auth_headers, create_feature
+
+def get_user_id(client: TestClient, headers: dict) -> int:
+    feature_id = create_feature(client, headers, "Probe")
+    return client.get(f"/features/{feature_id}").json()["author_id"]
+
+def capture_statements(request):
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        request()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return statements
+
+def query_plan(statement: str, parameters) -> str:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+def test_list_user_features_keyset_pagination(client: TestClient):
+    headers = get_auth_headers(client)
+    user_id = get_user_id(client, headers)
+    for i in range(4):
+        create_feature(client, headers, f"Feature {i}")
+    other_headers = get_auth_headers(client, "other@example.com")
+    create_feature(client, other_headers, "Not mine")
+
+    first = client.get(f"/users/{user_id}/features?limit=3").json()
+    assert [item["title"] for item in first["items"]] == ["Feature 3", "Feature 2", "Feature 1"]
+    assert first["next_cursor"] == first["items"][-1]["id"]
+
+    second = client.get(f"/users/{user_id}/features?limit=3&cursor={first['next_cursor']}").json()
+    assert [item["title"] for item in second["items"]] == ["Feature 0", "Probe"]
+    assert second["next_cursor"] is None
+
+def test_list_user_features_unknown_user(client: TestClient):
+    response = client.get("/users/999/features")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "User not found"
+
+def test_list_my_votes(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    feature_ids = [create_feature(client, author_headers, f"Feature {i}") for i in range(3)]
+    voter_headers = get_auth_headers(client, "voter@example.com")
+    for feature_id in feature_ids:
+        client.post("/votes/", json={"feature_id": feature_id}, headers=voter_headers)
+
+    first = client.get("/users/me/votes?limit=2", headers=voter_headers).json()
+    assert [item["feature_id"] for item in first["items"]] == feature_ids[:0:-1]
+    second = client.get(f"/users/me/votes?limit=2&cursor={first['next_cursor']}", headers=voter_headers).json()
+    assert [item["feature_id"] for item in second["items"]] == feature_ids[:1]
+    assert second["next_cursor"] is None
+
+def test_list_my_votes_requires_auth(client: TestClient):
+    assert client.get("/users/me/votes").status_code == 401
+
+def test_listings_are_scoped_to_a_board(client: TestClient):
+    author_headers = get_auth_headers(client, "author@example.com")
+    user_id = get_user_id(client, author_headers)
+    create_board(client, author_headers)
+    board_feature = create_board_feature(client, "mobile", author_headers)
+    voter_headers = get_auth_headers(client, "voter@example.com")
+    client.post("/votes/", json={"feature_id": create_feature(client, author_headers)}, headers=voter_headers)
+    client.post("/boards/mobile/votes", json={"feature_id": board_feature}, headers=voter_headers)
+    move("mobile", "secondary")
+
+    assert [item["title"] for item in client.get(f"/users/{user_id}/features").json()["items"]] == ["Test Feature", "Probe"]
+    items = client.get(f"/users/{user_id}/features?board=mobile&include=author").json()["items"]
+    assert [item["id"] for item in items] == [board_feature]
+    assert items[0]["author"]["email"] == "author@example.com"
+
+    assert len(client.get("/users/me/votes", headers=voter_headers).json()["items"]) == 1
+    items = client.get("/users/me/votes?board=mobile", headers=voter_headers).json()["items"]
+    assert [item["feature_id"] for item in items] == [board_feature]
+    assert client.get(f"/users/{user_id}/features?board=missing").status_code == 404
+
+def test_user_features_query_uses_author_index(client: TestClient):
+    headers = get_auth_headers(client)
+    user_id = get_user_id(client, headers)
+
+    statements = capture_statements(lambda: client.get(f"/users/{user_id}/features?cursor=100"))
+    statement, parameters = [s for s in statements if "features.author_id = ?" in s[0]][0]
+    plan = query_plan(statement, parameters)
+    assert "USING INDEX ix_features_author_id" in plan
+    assert "INDEX ix_votes_feature_id" in plan
+    assert "SCAN features" not in plan
+
+def test_my_votes_query_uses_user_index(client: TestClient):
+    headers = get_auth_headers(client)
+
+    statements = capture_statements(lambda: client.get("/users/me/votes", headers=headers))
+    statement, parameters = [s for s in statements if "FROM votes" in s[0]][0]
+    assert "USING INDEX ix_votes_user_id" in query_plan(statement, parameters)
+
+def test_duplicate_vote_check_uses_index(client: TestClient):
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT id FROM votes WHERE user_id = ? AND feature_id = ?", (1, 1)
+        ).fetchall()
+    plan = "\n".join(row[-1] for row in rows)
+    assert "USING INDEX ix_votes_" in plan
+    assert "SCAN votes" not in plan